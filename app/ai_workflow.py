@@ -1,3 +1,5 @@
+import asyncio
+import threading
 from langgraph.graph import StateGraph, END
 from typing import List, Dict, Union, Any
 
@@ -6,9 +8,10 @@ from .workflow_nodes import (
     analyze_data_node,
     understand_business_node,
     map_files_to_insights_node,
-    generate_insights_node
+    generate_insights_node,
+    close_llm_client
 )
-from .utils import setup_logger, file_objects_to_temp_paths, cleanup_temp_files
+from .utils import setup_logger, file_objects_to_temp_paths, create_temp_dir, cleanup_temp_dir
 
 # Setup logger
 logger = setup_logger(__name__)
@@ -35,11 +38,21 @@ def create_ai_workflow():
     logger.info("✅ Workflow created successfully")
     return workflow.compile()
 
-# Create workflow instance
-ai_workflow_app = create_ai_workflow()
+# Compiled workflow instance, built lazily on first use
+_compiled_workflow = None
+_workflow_lock = threading.Lock()
 
-def run_complete_workflow(files: Union[List[str], List[Dict[str, Any]]], business_description: str) -> Dict:
-    """Run complete workflow with error handling.
+def get_workflow():
+    """Return the compiled workflow, compiling it once on first use."""
+    global _compiled_workflow
+    if _compiled_workflow is None:
+        with _workflow_lock:
+            if _compiled_workflow is None:
+                _compiled_workflow = create_ai_workflow()
+    return _compiled_workflow
+
+async def run_complete_workflow_async(files: Union[List[str], List[Dict[str, Any]]], business_description: str) -> Dict:
+    """Run complete workflow on the event loop with error handling.
     
     Args:
         files: List of file paths (strings) or file data objects (dicts)
@@ -51,12 +64,12 @@ def run_complete_workflow(files: Union[List[str], List[Dict[str, Any]]], busines
     logger.info("🚀 Starting complete workflow...")
     
     # Convert file objects to paths if needed
-    temp_files_created = False
+    temp_dir = None
     if files and isinstance(files[0], dict):
         logger.info("📁 Converting file objects to temporary paths...")
-        file_paths = file_objects_to_temp_paths(files)
-        temp_files_created = True
-        logger.info(f"📁 Created {len(file_paths)} temporary files")
+        temp_dir = create_temp_dir()
+        file_paths = file_objects_to_temp_paths(files, temp_dir)
+        logger.info("📁 Created %d temporary files", len(file_paths))
     else:
         file_paths = files
     
@@ -73,11 +86,11 @@ def run_complete_workflow(files: Union[List[str], List[Dict[str, Any]]], busines
     }
     
     try:
-        logger.info(f"Processing {len(file_paths)} files...")
-        result = ai_workflow_app.invoke(initial_state)
+        logger.info("Processing %d files...", len(file_paths))
+        result = await get_workflow().ainvoke(initial_state)
         
-        logger.info(f"✅ Workflow completed successfully")
-        logger.info(f"Generated {len(result.get('final_insights', []))} insights")
+        logger.info("✅ Workflow completed successfully")
+        logger.info("Generated %d insights", len(result.get('final_insights', [])))
         
         return {
             "status": "success",
@@ -85,7 +98,7 @@ def run_complete_workflow(files: Union[List[str], List[Dict[str, Any]]], busines
         }
         
     except Exception as e:
-        logger.error(f"❌ Workflow failed: {e}")
+        logger.error("❌ Workflow failed: %s", e)
         return {
             "status": "error",
             "error": str(e),
@@ -93,9 +106,28 @@ def run_complete_workflow(files: Union[List[str], List[Dict[str, Any]]], busines
         }
     finally:
         # Clean up temporary files if we created them
-        if temp_files_created:
+        if temp_dir:
             logger.info("🧹 Cleaning up temporary files...")
-            cleanup_temp_files(file_paths)
+            cleanup_temp_dir(temp_dir)
+
+def run_complete_workflow(files: Union[List[str], List[Dict[str, Any]]], business_description: str) -> Dict:
+    """Run complete workflow synchronously (for callers without an event loop).
+    
+    Args:
+        files: List of file paths (strings) or file data objects (dicts)
+        business_description: Business description string
+        
+    Returns:
+        Dictionary with status and data/error
+    """
+    return asyncio.run(_run_workflow_and_close_llm(files, business_description))
+
+async def _run_workflow_and_close_llm(files: Union[List[str], List[Dict[str, Any]]], business_description: str) -> Dict:
+    """Run the workflow, then close this loop's LLM client before asyncio.run closes the loop."""
+    try:
+        return await run_complete_workflow_async(files, business_description)
+    finally:
+        await close_llm_client()
 
 def run_complete_workflow_with_file_objects(file_objects: List[Dict[str, Any]], business_description: str) -> Dict:
     """Run complete workflow with file objects (supports bytea data).
@@ -108,6 +140,6 @@ def run_complete_workflow_with_file_objects(file_objects: List[Dict[str, Any]],
         Dictionary with status and data/error
     """
     logger.info("🚀 Starting workflow with file objects...")
-    logger.info(f"📁 Processing {len(file_objects)} file objects")
+    logger.info("📁 Processing %d file objects", len(file_objects))
     
     return run_complete_workflow(file_objects, business_description)
@@ -1,72 +1,98 @@
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
 import pandas as pd
 import numpy as np
 import base64
 from io import BytesIO
-import matplotlib.pyplot as plt
-import sys
+import os
+import contextlib
 from typing import Dict, List, Any
+from langchain_core.messages import SystemMessage, HumanMessage
 
-from .utils import safe_json_parse, setup_logger
+from .utils import safe_json_parse, setup_logger, load_dataframe, summarize_file
+from .llm_cache import cached_ainvoke
+from .code_cache import make_code_cache_key, lookup_code, store_code, discard_code
+from .code_validator import validate_analysis_code, ALLOWED_IMPORTS
+from .workflow_types import HelpSuggestion
+from .config import LLM_MAX_CONCURRENCY, ANALYSIS_MAX_WORKERS, ANALYSIS_TIMEOUT_SECONDS
 
 # Setup logger
 logger = setup_logger(__name__)
 
+# pyplot is imported on first use; importing it costs a font cache scan and backend setup
+_plt = None
+
+def get_pyplot():
+    """Return matplotlib.pyplot, importing it with the headless Agg backend on first use."""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as pyplot
+        _plt = pyplot
+    return _plt
+
 def get_data_structure_info(relevant_files: List[str], file_metadata: Dict) -> str:
     """Format file metadata for LLM consumption."""
-    data_info = ""
+    parts = []
     for file_path in relevant_files:
         if file_path in file_metadata:
             metadata = file_metadata[file_path]
             if "error" not in metadata:
-                data_info += f"""
+                sample_rows = metadata.get('sample_rows', [])[:2]
+                parts.append(f"""
 File: {metadata['filename']}
 Columns: {metadata['columns']}
 Shape: {metadata['shape']}
 Data Types: {metadata['data_types']}
-Sample Data: {metadata['sample_rows'][:2]}
+Sample Data: {sample_rows}
 Numeric Columns: {metadata['numeric_columns']}
 Categorical Columns: {metadata['categorical_columns']}
 ---
-"""
-    return data_info
-
-def generate_analysis_code(suggestion: Dict, data_info: str, llm) -> str:
-    """Generate Python analysis code using LLM."""
-    
-    prompt = f"""Generate Python code to analyze data for this business insight:
+""")
+    return "".join(parts)
 
-INSIGHT: {suggestion['title']}
-DESCRIPTION: {suggestion['description']}
+def get_schema_signature(relevant_files: List[str], file_metadata: Dict) -> str:
+    """Describe the column layout of the relevant files, independent of row contents."""
+    parts = []
+    for file_path in relevant_files:
+        metadata = file_metadata.get(file_path, {})
+        if "error" not in metadata and "columns" in metadata:
+            data_types = metadata.get("data_types", {})
+            columns = ",".join(f"{column}:{data_types.get(column, '')}" for column in sorted(map(str, metadata["columns"])))
+            parts.append(f"{metadata['filename']}[{columns}]")
+    return ";".join(parts)
 
-DATA AVAILABLE:
-{data_info}
+# Invariant instructions kept as a stable prefix so provider-side prompt caching can reuse it
+ANALYSIS_CODE_SYSTEM_PROMPT = """You generate Python code to analyze data for a business insight.
 
 Generate a complete analyze_data function that:
-1. Loads files from file_paths parameter
+1. Loads files from file_paths parameter with load_data(path, columns), reading only the columns the analysis uses
 2. Performs business-relevant analysis for this specific insight
 3. Calculates meaningful metrics
-4. Creates 1 simple visualization using matplotlib
+4. Creates 1 simple visualization using matplotlib, titled with the insight title
 5. Returns structured results
 
 CODE TEMPLATE:
 ```python
 def analyze_data(file_paths):
-    results = {{
-        'metrics': {{}},
+    results = {
+        'metrics': {},
         'key_findings': [],
         'visualizations': [],
         'recommendations': []
-    }}
+    }
     
     try:
-        # Load data
-        dfs = []
-        for path in file_paths:
-            if path.endswith('.csv'):
-                df = pd.read_csv(path)
-            else:
-                df = pd.read_excel(path)
-            dfs.append(df)
+        # Load data - list only the columns this analysis needs (from DATA AVAILABLE)
+        REQUIRED_COLUMNS = ['column_a', 'column_b']
+        dfs = [load_data(path, REQUIRED_COLUMNS) for path in file_paths]
         
         main_df = dfs[0] if dfs else pd.DataFrame()
         
@@ -82,22 +108,16 @@ def analyze_data(file_paths):
         import matplotlib.pyplot as plt
         plt.figure(figsize=(8, 6))
         # Add your plot code here
-        plt.title("{suggestion['title']}")
+        plt.title("<INSIGHT TITLE>")
         
-        # Save plot (keep this part)
-        import base64
-        from io import BytesIO
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', bbox_inches='tight')
-        buffer.seek(0)
-        plot_base64 = base64.b64encode(buffer.read()).decode()
-        plt.close()
+        # Save plot (keep this part - encode_plot renders PNG and closes the figure)
+        plot_base64 = encode_plot()
         
-        results['visualizations'].append({{
-            'title': '{suggestion['title']} Chart',
+        results['visualizations'].append({
+            'title': '<INSIGHT TITLE> Chart',
             'type': 'analysis',
             'data': plot_base64
-        }})
+        })
         
         # Add recommendations
         # results['recommendations'].append("Specific actionable recommendation")
@@ -110,13 +130,76 @@ def analyze_data(file_paths):
 ```
 Generate ONLY the complete Python code with actual analysis logic. No explanations."""
 
+def build_analysis_code_messages(suggestion: HelpSuggestion, data_info: str) -> List:
+    """Build chat messages with the static prefix first and per-insight details last."""
+    user_message = f"""INSIGHT: {suggestion.title}
+DESCRIPTION: {suggestion.description}
+
+DATA AVAILABLE:
+{data_info}"""
+    return [
+        SystemMessage(content=ANALYSIS_CODE_SYSTEM_PROMPT),
+        HumanMessage(content=user_message)
+    ]
+
+async def generate_analysis_code(suggestion: HelpSuggestion, data_info: str, llm, schema_signature: str = None) -> str:
+    """Generate Python analysis code using LLM, reusing cached code for a known schema.
+
+    New code is not cached here; update_code_cache stores it once it has run cleanly.
+    """
+    
+    cache_key = make_code_cache_key(suggestion, schema_signature) if schema_signature else None
+    if cache_key:
+        cached_code = lookup_code(cache_key)
+        if cached_code:
+            logger.info("♻️ Reusing cached analysis code for %s", suggestion.title)
+            return cached_code
+    
+    prompt = build_analysis_code_messages(suggestion, data_info)
+
     try:
-        response = llm.invoke(prompt)
-        return extract_code_from_response(response.content)
+        content = await cached_ainvoke(llm, prompt)
+        return extract_code_from_response(content)
     except Exception as e:
-        logger.error(f"❌ Code generation failed: {e}")
+        logger.error("❌ Code generation failed: %s", e)
         return create_fallback_analysis_code(suggestion)
 
+async def generate_analysis_code_batch(
+    suggestions: List[HelpSuggestion],
+    data_infos: List[str],
+    llm,
+    schema_signatures: List[str] = None
+) -> List[str]:
+    """Generate analysis code for several suggestions concurrently."""
+    semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    if schema_signatures is None:
+        schema_signatures = [None] * len(suggestions)
+    
+    async def _generate(suggestion: HelpSuggestion, data_info: str, schema_signature: str) -> str:
+        async with semaphore:
+            return await generate_analysis_code(suggestion, data_info, llm, schema_signature)
+    
+    return await asyncio.gather(*(
+        _generate(suggestion, data_info, schema_signature)
+        for suggestion, data_info, schema_signature in zip(suggestions, data_infos, schema_signatures)
+    ))
+
+def update_code_cache(
+    suggestions: List[HelpSuggestion],
+    schema_signatures: List[str],
+    codes: List[str],
+    analysis_results: List[Dict]
+) -> None:
+    """Cache generated code that validated and ran cleanly; evict cached code that failed."""
+    for suggestion, schema_signature, code, results in zip(suggestions, schema_signatures, codes, analysis_results):
+        if not schema_signature or not code:
+            continue
+        cache_key = make_code_cache_key(suggestion, schema_signature)
+        if "error" in results:
+            discard_code(cache_key)
+        elif code != create_fallback_analysis_code(suggestion) and lookup_code(cache_key) != code:
+            store_code(cache_key, code)
+
 def extract_code_from_response(llm_response: str) -> str:
     """Extract Python code from LLM response."""
     if "```python" in llm_response:
@@ -128,7 +211,7 @@ def extract_code_from_response(llm_response: str) -> str:
 
     return code.strip()
 
-def create_fallback_analysis_code(suggestion: Dict) -> str:
+def create_fallback_analysis_code(suggestion: HelpSuggestion) -> str:
     """Create basic fallback analysis code."""
     return f'''
 def analyze_data(file_paths):
@@ -142,12 +225,13 @@ def analyze_data(file_paths):
     try:
         import pandas as pd
         
+        # Only the row count is needed, so load a single column
         dfs = []
         for path in file_paths:
             if path.endswith('.csv'):
-                df = pd.read_csv(path)
+                df = pd.read_csv(path, usecols=[0])
             else:
-                df = pd.read_excel(path)
+                df = pd.read_excel(path, usecols=[0])
             dfs.append(df)
         
         main_df = dfs[0] if dfs else pd.DataFrame()
@@ -163,74 +247,213 @@ def analyze_data(file_paths):
         return results
 '''
 
+def encode_plot(fig=None) -> str:
+    """Render a figure (default: current) to base64 PNG and close it."""
+    plt = get_pyplot()
+    fig = fig or plt.gcf()
+    buffer = BytesIO()
+    try:
+        fig.savefig(buffer, format='png', bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+def _restricted_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """__import__ for generated code, limited at runtime to the validator's allowlist."""
+    if level or name.split('.')[0] not in ALLOWED_IMPORTS:
+        raise ImportError(f"Import of '{name}' is not allowed in analysis code")
+    return __import__(name, globals, locals, fromlist, level)
+
+# Built once at import; exec requires a real dict for __builtins__, so each run gets a copy
+_SAFE_BUILTINS = {
+    'len': len, 'range': range, 'enumerate': enumerate,
+    'zip': zip, 'sum': sum, 'max': max, 'min': min,
+    'abs': abs, 'round': round, 'str': str, 'int': int,
+    'float': float, 'list': list, 'dict': dict,
+    'print': print, 'sorted': sorted, 'any': any, 'all': all,
+    '__import__': _restricted_import, '__name__': '__main__'
+}
+
+_BASE_SAFE_GLOBALS = {
+    'pandas': pd,
+    'pd': pd,
+    'numpy': np,
+    'np': np,
+    'base64': base64,
+    'BytesIO': BytesIO,
+    'encode_plot': encode_plot
+}
+
+def load_data(dtype_hints: Dict[str, Dict[str, str]], path: str, columns: List[str] = None) -> pd.DataFrame:
+    """Load a file for generated code, reusing profiled dtypes and reading only the listed columns."""
+    usecols = None
+    hints = dtype_hints.get(path) or None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda column: column in wanted
+        if hints:
+            hints = {column: dtype for column, dtype in hints.items() if column in wanted} or None
+    
+    if hints:
+        try:
+            return load_dataframe(path, dtype=hints, usecols=usecols)
+        except Exception as e:
+            logger.debug("Dtype hints rejected for %s, re-reading with inference: %s", path, e)
+    return load_dataframe(path, usecols=usecols)
+
 def get_safe_builtins() -> Dict:
     """Return restricted builtins for safe code execution."""
-    return {
-        'len': len, 'range': range, 'enumerate': enumerate,
-        'zip': zip, 'sum': sum, 'max': max, 'min': min,
-        'abs': abs, 'round': round, 'str': str, 'int': int,
-        'float': float, 'list': list, 'dict': dict,
-        'print': print, 'sorted': sorted, 'any': any, 'all': all,
-        '__import__': __import__, '__name__': '__main__'
-    }
+    return _SAFE_BUILTINS.copy()
+
+@lru_cache(maxsize=256)
+def compile_analysis_code(code: str) -> types.CodeType:
+    """Validate and compile generated analysis code once, reusing the code object."""
+    tree = validate_analysis_code(code)
+    digest = hashlib.blake2b(code.encode("utf-8"), digest_size=16).hexdigest()
+    return compile(tree, f"<analysis:{digest[:8]}>", "exec")
+
+def execute_analysis_code(code: str, file_paths: List[str], dtype_hints: Dict[str, Dict[str, str]] = None) -> Dict:
+    """Safely execute generated analysis code.
 
-def execute_analysis_code(code: str, file_paths: List[str]) -> Dict:
-    """Safely execute generated analysis code."""
-    logger.info("🔧 Executing analysis code...")
+    dtype_hints maps file paths to column dtypes already known from profiling;
+    the load_data helper given to the code uses them to skip type inference.
+    """
+    logger.debug("🔧 Executing analysis code...")
     
     try:
         # Create safe execution environment
-        safe_globals = {
-            'pandas': pd,
-            'pd': pd,
-            'numpy': np,
-            'np': np,
-            'matplotlib': plt,
-            'plt': plt,
-            'base64': base64,
-            'BytesIO': BytesIO,
-            '__builtins__': get_safe_builtins()
-        }
-        
-        safe_locals = {'file_paths': file_paths}
+        plt = get_pyplot()
+        safe_globals = _BASE_SAFE_GLOBALS.copy()
+        safe_globals['matplotlib'] = plt
+        safe_globals['plt'] = plt
+        safe_globals['__builtins__'] = get_safe_builtins()
+        safe_globals['load_data'] = partial(load_data, dtype_hints or {})
         
-        # Capture stdout
-        old_stdout = sys.stdout
-        from io import StringIO
-        sys.stdout = captured_output = StringIO()
+        safe_globals['file_paths'] = file_paths
         
-        try:
-            # Execute the generated code
-            exec(code, safe_globals, safe_locals)
+        # Discard stdout from generated code; it is never surfaced to callers
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            # Execute the generated code in one namespace so its module-level
+            # imports are visible inside analyze_data
+            exec(compile_analysis_code(code), safe_globals)
             
             # Call the analyze_data function
-            if 'analyze_data' in safe_locals:
-                results = safe_locals['analyze_data'](file_paths)
-                logger.info("✅ Code executed successfully")
+            if 'analyze_data' in safe_globals:
+                results = safe_globals['analyze_data'](file_paths)
+                logger.debug("✅ Code executed successfully")
                 return results
             else:
                 logger.error("❌ analyze_data function not found")
                 return {"error": "analyze_data function not found in generated code"}
-                
-        finally:
-            sys.stdout = old_stdout
             
     except Exception as e:
-        logger.error(f"❌ Code execution failed: {e}")
-        return {
-            "error": f"Execution failed: {str(e)}",
-            "metrics": {},
-            "key_findings": ["Analysis could not be completed due to execution error"],
-            "visualizations": [],
-            "recommendations": ["Please check data format and try again"]
-        }
+        logger.error("❌ Code execution failed: %s", e)
+        return _execution_error_result(e)
+
+def _execution_error_result(error: Exception) -> Dict:
+    return {
+        "error": f"Execution failed: {str(error)}",
+        "metrics": {},
+        "key_findings": ["Analysis could not be completed due to execution error"],
+        "visualizations": [],
+        "recommendations": ["Please check data format and try again"]
+    }
+
+# Shared worker pool; generated analyses are CPU-bound pandas work that the GIL would serialize
+_analysis_pool = None
+_analysis_pool_lock = threading.Lock()
+
+def _warm_analysis_worker() -> None:
+    """Import heavy libraries once per worker process."""
+    get_pyplot()
+
+def get_analysis_pool() -> ProcessPoolExecutor:
+    """Return the shared analysis worker pool, creating it on first use."""
+    global _analysis_pool
+    if _analysis_pool is None:
+        with _analysis_pool_lock:
+            if _analysis_pool is None:
+                _analysis_pool = ProcessPoolExecutor(
+                    max_workers=ANALYSIS_MAX_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_analysis_worker
+                )
+    return _analysis_pool
+
+def shutdown_analysis_pool(terminate: bool = False) -> None:
+    """Shut down the shared analysis worker pool.
+
+    With terminate, busy workers are killed too (e.g. to reclaim one stuck in a
+    hung analysis); tasks still running on them fail with BrokenProcessPool.
+    """
+    global _analysis_pool
+    with _analysis_pool_lock:
+        if _analysis_pool is not None:
+            pool, _analysis_pool = _analysis_pool, None
+            # Grab the workers first; shutdown() forgets them
+            processes = list((pool._processes or {}).values()) if terminate else []
+            pool.shutdown(wait=False, cancel_futures=True)
+            # ProcessPoolExecutor has no public way to stop a running task
+            for process in processes:
+                process.terminate()
+
+def summarize_file_in_pool(file_path: str) -> Dict:
+    """Profile a file in the shared worker pool so pandas parsing runs outside this process's GIL."""
+    try:
+        return get_analysis_pool().submit(summarize_file, file_path).result()
+    except BrokenProcessPool as e:
+        logger.error("❌ Analysis worker crashed while profiling %s: %s", file_path, e)
+        shutdown_analysis_pool()
+        return summarize_file(file_path)
 
-def generate_insight_summary(suggestion: Dict, analysis_results: Dict, llm) -> Dict:
+async def execute_analysis_code_batch(
+    codes: List[str],
+    files_per_code: List[List[str]],
+    dtype_hints: Dict[str, Dict[str, str]] = None
+) -> List[Dict]:
+    """Execute several generated analyses in parallel worker processes."""
+    loop = asyncio.get_running_loop()
+    pool = get_analysis_pool()
+    
+    async def _execute(code: str, file_paths: List[str]) -> Dict:
+        # Ship only the hints for this analysis' files to the worker
+        hints = {path: dtype_hints[path] for path in file_paths if path in dtype_hints} if dtype_hints else None
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(pool, execute_analysis_code, code, file_paths, hints),
+                ANALYSIS_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError as e:
+            # The worker is still busy with the hung analysis; kill it and start a fresh pool
+            logger.error("❌ Analysis timed out after %ss", ANALYSIS_TIMEOUT_SECONDS)
+            shutdown_analysis_pool(terminate=True)
+            return _execution_error_result(TimeoutError(f"analysis exceeded {ANALYSIS_TIMEOUT_SECONDS}s"))
+        except BrokenProcessPool as e:
+            # A worker died (e.g. out of memory); replace the pool for later runs
+            logger.error("❌ Analysis worker crashed: %s", e)
+            shutdown_analysis_pool()
+            return _execution_error_result(e)
+        except asyncio.CancelledError:
+            # A pool shutdown cancelled the queued task; only our own cancellation propagates
+            if asyncio.current_task().cancelling():
+                raise
+            logger.error("❌ Analysis cancelled by a worker pool shutdown")
+            return _execution_error_result(RuntimeError("cancelled by a worker pool shutdown"))
+        except Exception as e:
+            # E.g. a result that cannot be pickled back; fail only this insight
+            logger.error("❌ Analysis execution failed: %s", e)
+            return _execution_error_result(e)
+    
+    return await asyncio.gather(*(
+        _execute(code, file_paths) for code, file_paths in zip(codes, files_per_code)
+    ))
+
+async def generate_insight_summary(suggestion: HelpSuggestion, analysis_results: Dict, llm) -> Dict:
     """Generate business summary from technical analysis results."""
     
     if 'error' in analysis_results:
         return {
-            "executive_summary": f"Analysis for {suggestion['title']} encountered issues",
+            "executive_summary": f"Analysis for {suggestion.title} encountered issues",
             "key_findings": ["Technical analysis could not be completed"],
             "recommendations": ["Please check data quality and format"],
             "next_steps": ["Verify data integrity and retry analysis"]
@@ -239,8 +462,8 @@ def generate_insight_summary(suggestion: Dict, analysis_results: Dict, llm) -> D
     try:
         prompt = f"""Convert these technical analysis results into clear business insights:
 
-ANALYSIS FOR: {suggestion['title']}
-DESCRIPTION: {suggestion['description']}
+ANALYSIS FOR: {suggestion.title}
+DESCRIPTION: {suggestion.description}
 
 TECHNICAL RESULTS:
 - Metrics: {analysis_results.get('metrics', {})}
@@ -255,9 +478,9 @@ Provide business-friendly summary as JSON:
     "next_steps": ["immediate action 1", "immediate action 2"]
 }}"""
 
-        response = llm.invoke(prompt)
-        business_insights = safe_json_parse(response.content, {
-            "executive_summary": f"Analysis completed for {suggestion['title']}",
+        content = await cached_ainvoke(llm, prompt)
+        business_insights = safe_json_parse(content, {
+            "executive_summary": f"Analysis completed for {suggestion.title}",
             "key_findings": analysis_results.get('key_findings', ["Analysis in progress"]),
             "recommendations": analysis_results.get('recommendations', ["Review results"]),
             "next_steps": ["Continue monitoring", "Implement recommendations"]
@@ -266,10 +489,22 @@ Provide business-friendly summary as JSON:
         return business_insights
         
     except Exception as e:
-        logger.error(f"❌ Insight summary generation failed: {e}")
+        logger.error("❌ Insight summary generation failed: %s", e)
         return {
-            "executive_summary": f"Technical analysis completed for {suggestion['title']}",
+            "executive_summary": f"Technical analysis completed for {suggestion.title}",
             "key_findings": analysis_results.get('key_findings', ["Analysis completed"]),
             "recommendations": analysis_results.get('recommendations', ["Review technical results"]),
             "next_steps": ["Analyze results", "Take action based on findings"]
         }
+
+async def generate_insight_summary_batch(suggestions: List[HelpSuggestion], analysis_results: List[Dict], llm) -> List[Dict]:
+    """Generate business summaries for several analyses concurrently."""
+    semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    
+    async def _summarize(suggestion: HelpSuggestion, results: Dict) -> Dict:
+        async with semaphore:
+            return await generate_insight_summary(suggestion, results, llm)
+    
+    return await asyncio.gather(*(
+        _summarize(suggestion, results) for suggestion, results in zip(suggestions, analysis_results)
+    ))
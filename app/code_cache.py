@@ -0,0 +1,62 @@
+"""
+On-disk cache of generated analysis code keyed by insight and data schema
+"""
+import contextlib
+import hashlib
+import os
+import tempfile
+import time
+from typing import Optional
+
+from .config import ANALYSIS_CODE_CACHE_DIR, ANALYSIS_CODE_CACHE_TTL_SECONDS
+from .utils import setup_logger
+from .workflow_types import HelpSuggestion
+
+logger = setup_logger(__name__)
+
+def make_code_cache_key(suggestion: HelpSuggestion, schema_signature: str) -> str:
+    """Build a cache key from the insight definition and the data schema."""
+    raw = f"{suggestion.title}|{suggestion.description}|{schema_signature}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _entry_path(key: str) -> str:
+    return os.path.join(ANALYSIS_CODE_CACHE_DIR, f"{key}.py")
+
+def lookup_code(key: str) -> Optional[str]:
+    """Return cached analysis code for a key, or None if missing or expired."""
+    path = _entry_path(key)
+    try:
+        if time.time() - os.path.getmtime(path) > ANALYSIS_CODE_CACHE_TTL_SECONDS:
+            os.unlink(path)
+            return None
+        with open(path, "r", encoding="utf-8") as cached_file:
+            return cached_file.read()
+    except OSError:
+        return None
+
+def store_code(key: str, code: str) -> None:
+    """Persist analysis code atomically so concurrent readers never see partial files."""
+    tmp_path = None
+    try:
+        os.makedirs(ANALYSIS_CODE_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=ANALYSIS_CODE_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+            tmp_file.write(code)
+        os.replace(tmp_path, _entry_path(key))
+        tmp_path = None
+    except OSError as e:
+        logger.warning("⚠️ Failed to cache analysis code: %s", e)
+    finally:
+        # Don't leave half-written temp files behind when the write or rename fails
+        if tmp_path is not None:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+
+def discard_code(key: str) -> None:
+    """Remove cached analysis code for a key, e.g. after it failed to execute."""
+    try:
+        os.unlink(_entry_path(key))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("⚠️ Failed to discard cached analysis code: %s", e)
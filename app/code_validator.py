@@ -0,0 +1,83 @@
+"""
+Static checks for LLM-generated analysis code before it is compiled
+"""
+import ast
+
+# Top-level modules generated analysis code may import
+ALLOWED_IMPORTS = frozenset({
+    'pandas', 'numpy', 'matplotlib', 'seaborn',
+    'base64', 'io', 'math', 'statistics', 'datetime',
+    'collections', 'itertools', 're', 'json'
+})
+
+FORBIDDEN_CALLS = frozenset({
+    'exec', 'eval', 'compile', 'open', 'globals', 'locals', 'vars',
+    '__import__', 'getattr', 'setattr', 'delattr'
+})
+
+# Constructs that can never leave the enclosing loop when they run
+_NESTED_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+_LOOPS = (ast.For, ast.AsyncFor, ast.While)
+
+def _check_import(module_name: str) -> None:
+    if module_name.split('.')[0] not in ALLOWED_IMPORTS:
+        raise ValueError(f"Import of '{module_name}' is not allowed in analysis code")
+
+def _has_break(loop: ast.While) -> bool:
+    """Whether a break or return in the loop body can leave this loop.
+
+    A break inside a nested loop only leaves that loop, and nothing defined in
+    a nested function or class runs as part of the loop body.
+    """
+    pending = [(node, False) for node in loop.body]
+    while pending:
+        node, in_nested_loop = pending.pop()
+        if isinstance(node, ast.Return) or (isinstance(node, ast.Break) and not in_nested_loop):
+            return True
+        if isinstance(node, _NESTED_SCOPES):
+            continue
+        if isinstance(node, _LOOPS):
+            # The else clause runs in this loop's scope, the body in the nested loop's
+            pending.extend((child, True) for child in node.body)
+            pending.extend((child, in_nested_loop) for child in node.orelse)
+            continue
+        pending.extend((child, in_nested_loop) for child in ast.iter_child_nodes(node))
+    return False
+
+def validate_analysis_code(code: str) -> ast.Module:
+    """Parse generated code and reject disallowed constructs.
+
+    Args:
+        code: Python source produced by the LLM
+
+    Returns:
+        The parsed module, ready to pass to compile()
+
+    Raises:
+        ValueError: If the code fails to parse or uses a disallowed construct
+    """
+    try:
+        tree = ast.parse(code, mode='exec')
+    except SyntaxError as e:
+        raise ValueError(f"Generated code has a syntax error at line {e.lineno}: {e.msg}")
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                _check_import(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level or not node.module:
+                raise ValueError("Relative imports are not allowed in analysis code")
+            _check_import(node.module)
+        elif isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name) and node.func.id in FORBIDDEN_CALLS:
+                raise ValueError(f"Call to '{node.func.id}' is not allowed in analysis code")
+        elif isinstance(node, ast.Attribute):
+            # Dunder attributes (__class__, __subclasses__, __globals__, ...) reach outside the sandbox
+            if node.attr.startswith('__') and node.attr.endswith('__'):
+                raise ValueError(f"Access to '{node.attr}' is not allowed in analysis code")
+        elif isinstance(node, ast.While):
+            if isinstance(node.test, ast.Constant) and node.test.value and not _has_break(node):
+                raise ValueError("Unbounded 'while True' loop without break in analysis code")
+
+    return tree
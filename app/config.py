@@ -1,30 +1,65 @@
 import os
-from typing import Optional
+from dataclasses import dataclass
+from functools import cache
+from typing import Optional, Tuple
 
-# Environment variables
-AZURE_OPENAI_API_KEY: Optional[str] = os.getenv("AZURE_OPENAI_API_KEY")
-AZURE_OPENAI_ENDPOINT: Optional[str] = os.getenv("AZURE_OPENAI_ENDPOINT")
-LANGCHAIN_API_KEY: Optional[str] = os.getenv("LANGCHAIN_API_KEY")
-LANGCHAIN_TRACING_V2: str = os.getenv("LANGCHAIN_TRACING_V2", "true")
+@dataclass(frozen=True)
+class EnvConfig:
+    """Credentials read from the environment."""
+    azure_openai_api_key: Optional[str]
+    azure_openai_endpoint: Optional[str]
+    langchain_api_key: Optional[str]
+    langchain_tracing_v2: str
+
+@dataclass(frozen=True)
+class ValidationResult:
+    """Outcome of validate_environment; falsy when required variables are missing."""
+    missing: Tuple[str, ...]
+
+    def __bool__(self) -> bool:
+        return not self.missing
+
+@cache
+def get_env() -> EnvConfig:
+    """Read environment variables once, on first use (after any .env file is loaded)."""
+    return EnvConfig(
+        azure_openai_api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        azure_openai_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        langchain_api_key=os.getenv("LANGCHAIN_API_KEY"),
+        langchain_tracing_v2=os.getenv("LANGCHAIN_TRACING_V2", "true")
+    )
 
 # Azure OpenAI Configuration
 AZURE_OPENAI_API_VERSION: str = "2024-02-01"
 AZURE_DEPLOYMENT_NAME: str = "gpt-4o"  # Using gpt-4o deployment
 LLM_TEMPERATURE: float = 0.1
+LLM_MAX_CONCURRENCY: int = 10  # Max in-flight LLM calls per batch
+LLM_HTTP_MAX_CONNECTIONS: int = 64  # Sockets the shared LLM HTTP client may open
+LLM_HTTP_MAX_KEEPALIVE: int = 32  # Idle sockets kept warm between LLM calls
 
 # File Configuration
 ALLOWED_FILE_EXTENSIONS = ['.csv', '.xlsx', '.xls']
 MAX_FILE_SIZE_MB = 50
 
-def validate_environment() -> bool:
-    """Validate required environment variables are set."""
-    if not AZURE_OPENAI_API_KEY:
-        print("⚠️  AZURE_OPENAI_API_KEY not set")
-        return False
-    
-    if not AZURE_OPENAI_ENDPOINT:
-        print("⚠️  AZURE_OPENAI_ENDPOINT not set")
-        return False
-    
-    print("✅ Environment variables validated")
-    return True
+# Threads used to load and profile uploaded files in parallel
+FILE_LOAD_MAX_WORKERS: int = 8
+
+# Generated analysis code cache
+ANALYSIS_CODE_CACHE_DIR: str = os.getenv("ANALYSIS_CODE_CACHE_DIR", ".cache/analysis_code")
+ANALYSIS_CODE_CACHE_TTL_SECONDS: int = 7 * 86400
+
+# Worker processes for executing generated analysis code
+ANALYSIS_MAX_WORKERS: int = int(os.getenv("ANALYSIS_MAX_WORKERS", min(4, os.cpu_count() or 1)))
+# Seconds one generated analysis may run before its worker pool is recycled
+ANALYSIS_TIMEOUT_SECONDS: float = float(os.getenv("ANALYSIS_TIMEOUT_SECONDS", "300"))
+
+@cache
+def validate_environment() -> ValidationResult:
+    """Validate required environment variables are set; callers decide how to report."""
+    env = get_env()
+    missing = []
+    if not env.azure_openai_api_key:
+        missing.append("AZURE_OPENAI_API_KEY")
+    if not env.azure_openai_endpoint:
+        missing.append("AZURE_OPENAI_ENDPOINT")
+    return ValidationResult(missing=tuple(missing))
@@ -2,17 +2,404 @@
 Database connection and operations for job queue system
 """
 import os
+import time
 import asyncio
+import threading
+from contextlib import contextmanager, nullcontext
 import psycopg
-from psycopg.rows import dict_row
-from typing import List, Dict, Any, Optional
-import json
+from psycopg.rows import dict_row, class_row
+from psycopg.types.json import Jsonb, set_json_loads
+from psycopg_pool import ConnectionPool, AsyncConnectionPool
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
 from datetime import datetime
+from statistics import fmean
+import orjson
 
 from .utils import setup_logger, safe_json_dumps
 
 logger = setup_logger(__name__)
 
+# Decode json/jsonb results with orjson instead of the stdlib parser
+set_json_loads(orjson.loads)
+
+# Channel the processing_jobs trigger notifies when a job becomes pending
+JOB_NOTIFY_CHANNEL = 'new_job'
+
+# Pre-joined insights/jobs/files view backing get_recent_insights (see README_CRON.md)
+RECENT_INSIGHTS_VIEW = 'mv_recent_insights'
+
+# Minimum seconds between view refreshes; insight writes only mark the view stale
+RECENT_INSIGHTS_REFRESH_INTERVAL = float(os.getenv('RECENT_INSIGHTS_REFRESH_INTERVAL', '30'))
+
+# TCP keepalives so sockets dropped by NATs or PgBouncer are detected instead of hanging
+KEEPALIVE_SETTINGS = {
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'tcp_user_timeout': 15000
+}
+
+def prepare_settings() -> Dict[str, Any]:
+    """Server-side prepare option from DB_PREPARE_THRESHOLD; psycopg's default applies when unset."""
+    value = os.getenv('DB_PREPARE_THRESHOLD')
+    if value is None:
+        return {}
+    value = value.strip()
+    # Empty or 'none' disables preparing, e.g. behind PgBouncer transaction pooling
+    if not value or value.lower() == 'none':
+        return {'prepare_threshold': None}
+    return {'prepare_threshold': int(value)}
+
+def pool_settings() -> Dict[str, Any]:
+    """Sizing, recycling and connection options shared by the sync and async pools."""
+    return {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        # Default to ~2x CPU cores, capped so many workers don't exhaust server connections
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE') or min(20, max(4, (os.cpu_count() or 1) * 2))),
+        # Recycle connections before proxies and NATs silently drop them
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '600')),
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '60')),
+        'kwargs': {
+            'row_factory': dict_row,
+            **prepare_settings(),
+            **KEEPALIVE_SETTINGS
+        }
+    }
+
+# Failed jobs are requeued until they have been retried this many times
+MAX_JOB_RETRIES = 3
+
+# Insight keys checked, in order, for a numeric confidence score
+CONFIDENCE_KEYS = ('confidence', 'confidence_score', 'score', 'certainty')
+
+@dataclass(slots=True)
+class FileRow:
+    """Row shape for file lookups (built positionally, no per-row dict)."""
+    id: Any
+    filename: Optional[str]
+    original_name: Optional[str]
+    file_path: Optional[str]
+    file_data: Optional[bytes]
+    mime_type: Optional[str]
+    file_size: Optional[int]
+
+# jsonb_build_object fields shared by the insight listing queries (alias r)
+INSIGHT_JSON_FIELDS = """
+    'id', r.id::text,
+    'job_id', r.job_id::text,
+    'file_id', r.file_id::text,
+    'insight_type', r.insight_type,
+    'content', r.content,
+    'confidence_score', COALESCE(r.confidence_score, 0)::float8,
+    'metadata', COALESCE(r.metadata::jsonb, '{}'::jsonb),
+    'created_at', r.created_at,
+    'job_type', r.job_type
+"""
+
+# Latest insights row for a job, shaped for the API by Postgres
+INSIGHTS_BY_JOB_SQL = """
+    SELECT jsonb_build_object(
+        'id', r.id::text,
+        'job_id', r.job_id::text,
+        'file_id', r.file_id::text,
+        'insight_type', r.insight_type,
+        'content', r.content,
+        'confidence_score', COALESCE(r.confidence_score, 0)::float8,
+        'metadata', COALESCE(r.metadata::jsonb, '{}'::jsonb),
+        'created_at', r.created_at,
+        'individual_insights', COALESCE(r.content::jsonb -> 'final_insights', '[]'::jsonb),
+        'summary', COALESCE(r.content::jsonb -> 'summary', '{}'::jsonb)
+    ) AS insight_record
+    FROM insights r
+    WHERE r.job_id = %s 
+    ORDER BY r.created_at DESC
+    LIMIT 1
+"""
+
+# All insights for a file as one JSON array, newest first
+INSIGHTS_BY_FILE_SQL = f"""
+    SELECT COALESCE(
+        jsonb_agg(jsonb_build_object({INSIGHT_JSON_FIELDS}) ORDER BY r.created_at DESC),
+        '[]'::jsonb
+    ) AS insights
+    FROM (
+        SELECT i.*, pj.job_type
+        FROM insights i
+        JOIN processing_jobs pj ON i.job_id = pj.id
+        WHERE i.file_id = %s
+    ) r
+"""
+
+def _recent_insights_sql(source: str) -> str:
+    return f"""
+        SELECT COALESCE(
+            jsonb_agg(
+                jsonb_build_object({INSIGHT_JSON_FIELDS}, 'file_name', r.file_name)
+                ORDER BY r.created_at DESC
+            ),
+            '[]'::jsonb
+        ) AS insights
+        FROM (
+            {source}
+            ORDER BY created_at DESC
+            LIMIT %s
+        ) r
+    """
+
+def _recent_insight_rows_sql(source: str) -> str:
+    return f"""
+        SELECT jsonb_build_object({INSIGHT_JSON_FIELDS}, 'file_name', r.file_name)::text AS insight
+        FROM (
+            {source}
+            ORDER BY created_at DESC
+            LIMIT %s
+        ) r
+        ORDER BY r.created_at DESC
+    """
+
+RECENT_INSIGHTS_VIEW_SOURCE = f"SELECT * FROM {RECENT_INSIGHTS_VIEW}"
+RECENT_INSIGHTS_LIVE_SOURCE = """
+    SELECT i.*, pj.job_type, f.original_name AS file_name
+    FROM insights i
+    JOIN processing_jobs pj ON i.job_id = pj.id
+    LEFT JOIN files f ON i.file_id = f.id
+"""
+
+# Most recent insights, read from the materialized view or joined live
+RECENT_INSIGHTS_FROM_VIEW_SQL = _recent_insights_sql(RECENT_INSIGHTS_VIEW_SOURCE)
+RECENT_INSIGHTS_LIVE_SQL = _recent_insights_sql(RECENT_INSIGHTS_LIVE_SOURCE)
+
+# Same listing one serialized insight per row, for streaming responses
+RECENT_INSIGHT_ROWS_FROM_VIEW_SQL = _recent_insight_rows_sql(RECENT_INSIGHTS_VIEW_SOURCE)
+RECENT_INSIGHT_ROWS_LIVE_SQL = _recent_insight_rows_sql(RECENT_INSIGHTS_LIVE_SOURCE)
+
+# Dashboard statistics over all insights in a single round-trip
+INSIGHTS_STATS_SQL = """
+    WITH totals AS (
+        SELECT COUNT(*) AS total,
+               AVG(confidence_score)::float8 AS avg_confidence,
+               COUNT(*) FILTER (WHERE created_at >= NOW() - INTERVAL '7 days') AS recent_count
+        FROM insights
+    ),
+    by_type AS (
+        SELECT COALESCE(jsonb_agg(t ORDER BY t.count DESC), '[]'::jsonb) AS insights_by_type
+        FROM (
+            SELECT insight_type, COUNT(*) AS count
+            FROM insights
+            GROUP BY insight_type
+        ) t
+    )
+    SELECT totals.total, totals.avg_confidence, totals.recent_count, by_type.insights_by_type
+    FROM totals, by_type
+"""
+
+# Insert one insights row per job, resolving file_id from the job and deriving
+# the metadata summary from content
+SAVE_ANALYSIS_RESULTS_SQL = """
+    INSERT INTO insights (
+        job_id, 
+        file_id, 
+        insight_type, 
+        content, 
+        confidence_score, 
+        metadata, 
+        created_at
+    )
+    SELECT
+        %(job_id)s::uuid,
+        (SELECT pj.file_id FROM processing_jobs pj WHERE pj.id = %(job_id)s::uuid),
+        %(insight_type)s::text,
+        p.content,
+        %(confidence_score)s::numeric,
+        jsonb_build_object(
+            'total_insights', s.total_insights,
+            'insight_types', s.insight_types,
+            'analysis_summary', jsonb_build_object(
+                'total_metrics', s.total_metrics,
+                'total_findings', s.total_findings,
+                'total_recommendations', s.total_recommendations,
+                'total_visualizations', s.total_visualizations
+            ),
+            'execution_info', jsonb_build_object(
+                'generated_at', p.content -> 'final_insights' -> 0 -> 'generated_at',
+                'status', s.status
+            )
+        ),
+        CURRENT_TIMESTAMP
+    FROM (SELECT %(content)s AS content) p
+    CROSS JOIN LATERAL (
+        SELECT
+            count(*) AS total_insights,
+            COALESCE(jsonb_agg(COALESCE(x.value ->> 'title', 'General Analysis') ORDER BY x.ord), '[]'::jsonb) AS insight_types,
+            COALESCE(sum(CASE WHEN jsonb_typeof(x.value -> 'metrics') = 'object'
+                              THEN (SELECT count(*) FROM jsonb_object_keys(x.value -> 'metrics')) ELSE 0 END), 0) AS total_metrics,
+            COALESCE(sum(CASE WHEN jsonb_typeof(x.value -> 'key_findings') = 'array'
+                              THEN jsonb_array_length(x.value -> 'key_findings') ELSE 0 END), 0) AS total_findings,
+            COALESCE(sum(CASE WHEN jsonb_typeof(x.value -> 'recommendations') = 'array'
+                              THEN jsonb_array_length(x.value -> 'recommendations') ELSE 0 END), 0) AS total_recommendations,
+            COALESCE(sum(CASE WHEN jsonb_typeof(x.value -> 'visualizations') = 'array'
+                              THEN jsonb_array_length(x.value -> 'visualizations') ELSE 0 END), 0) AS total_visualizations,
+            CASE WHEN bool_and(x.value ->> 'status' IS DISTINCT FROM 'error')
+                 THEN 'success' ELSE 'partial_success' END AS status
+        FROM jsonb_array_elements(p.content -> 'final_insights') WITH ORDINALITY AS x(value, ord)
+    ) s
+"""
+
+def _claim_with_file_paths_sql(claim: str) -> str:
+    """Wrap a claiming UPDATE so the same statement returns each job's file path."""
+    return f"""
+        WITH claimed AS ({claim})
+        SELECT c.*, f.file_path
+        FROM claimed c
+        LEFT JOIN files f ON f.id = c.file_id AND f.status = 'uploaded'
+    """
+
+# Claim the oldest pending jobs, skipping rows another worker has locked
+CLAIM_JOBS_SQL = _claim_with_file_paths_sql("""
+    UPDATE processing_jobs 
+    SET status = 'processing', 
+        started_at = CURRENT_TIMESTAMP
+    WHERE id IN (
+        SELECT id FROM processing_jobs 
+        WHERE status = 'pending' 
+        ORDER BY created_at ASC 
+        LIMIT %s 
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, file_id, job_type, business_description, metadata, created_at
+""")
+
+# Lock-free claim for distributed backends (CockroachDB) where SKIP LOCKED is
+# slow or unsupported; serializable isolation plus the status re-check ensures
+# a job is only returned to one claimant
+CLAIM_JOBS_ATOMIC_SQL = _claim_with_file_paths_sql("""
+    UPDATE processing_jobs 
+    SET status = 'processing', 
+        started_at = CURRENT_TIMESTAMP
+    WHERE status = 'pending' 
+      AND id IN (
+        SELECT id FROM processing_jobs 
+        WHERE status = 'pending' 
+        ORDER BY created_at ASC 
+        LIMIT %s
+    )
+    RETURNING id, file_id, job_type, business_description, metadata, created_at
+""")
+
+# Claim the oldest pending job and fetch its uploaded file in the same round-trip
+CLAIM_JOB_WITH_FILES_SQL = """
+    WITH claimed AS (
+        UPDATE processing_jobs 
+        SET status = 'processing', 
+            started_at = CURRENT_TIMESTAMP
+        WHERE id = (
+            SELECT id FROM processing_jobs 
+            WHERE status = 'pending' 
+            ORDER BY created_at ASC 
+            LIMIT 1 
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, file_id, job_type, business_description, metadata, created_at
+    )
+    SELECT c.id, c.file_id, c.job_type, c.business_description, c.metadata, c.created_at,
+           f.filename, f.original_name, f.file_path, f.file_data, f.mime_type, f.file_size
+    FROM claimed c
+    LEFT JOIN files f ON f.id = c.file_id AND f.status = 'uploaded'
+"""
+
+# File rows (payload included) for a batch of ids
+FILE_DATA_SQL = """
+    SELECT f.id, f.filename, f.original_name, f.file_path, f.file_data, f.mime_type, f.file_size
+    FROM files f
+    JOIN unnest(%s::uuid[]) AS t(id) USING (id)
+    WHERE f.status = 'uploaded'
+"""
+
+# Paths only for a batch of ids, never the bytea payload
+FILE_PATHS_SQL = """
+    SELECT f.id, f.file_path
+    FROM files f
+    JOIN unnest(%s::uuid[]) AS t(id) USING (id)
+    WHERE f.status = 'uploaded' AND f.file_path IS NOT NULL
+"""
+
+# Job status transitions written by update_job_status
+COMPLETE_JOB_SQL = """
+    UPDATE processing_jobs 
+    SET status = %s, 
+        completed_at = CURRENT_TIMESTAMP, 
+        error_message = %s
+    WHERE id = %s
+"""
+
+FAIL_JOB_SQL = """
+    UPDATE processing_jobs 
+    SET status = %s, 
+        error_message = %s, 
+        retry_count = retry_count + 1
+    WHERE id = %s
+"""
+
+SET_JOB_STATUS_WITH_ERROR_SQL = """
+    UPDATE processing_jobs 
+    SET status = %s, 
+        error_message = %s
+    WHERE id = %s
+"""
+
+SET_JOB_STATUS_SQL = """
+    UPDATE processing_jobs 
+    SET status = %s
+    WHERE id = %s
+"""
+
+# File attached to a job
+JOB_FILE_ID_SQL = "SELECT file_id FROM processing_jobs WHERE id = %s"
+
+# Bulk load of per-insight rows
+COPY_INSIGHT_ROWS_SQL = """
+    COPY insights (job_id, file_id, insight_type, content, confidence_score, metadata)
+    FROM STDIN
+"""
+
+# Requeue a failed job while it has retries left, otherwise fail it for good
+FAIL_OR_RETRY_JOB_SQL = """
+    UPDATE processing_jobs 
+    SET status = CASE WHEN retry_count < %(max_retries)s THEN 'pending' ELSE 'failed' END,
+        started_at = CASE WHEN retry_count < %(max_retries)s THEN NULL ELSE started_at END,
+        retry_count = retry_count + 1,
+        error_message = %(error_message)s
+    WHERE id = %(job_id)s
+    RETURNING status
+"""
+
+# Retry bookkeeping for should_retry_job / reset_job_to_pending
+JOB_RETRY_COUNT_SQL = """
+    SELECT retry_count 
+    FROM processing_jobs 
+    WHERE id = %s
+"""
+
+RESET_JOB_SQL = """
+    UPDATE processing_jobs 
+    SET status = 'pending', started_at = NULL, error_message = NULL
+    WHERE id = %s
+"""
+
+# Hand claimed jobs that were never worked back to the queue; finished jobs are left alone
+RELEASE_JOBS_SQL = """
+    UPDATE processing_jobs 
+    SET status = 'pending', started_at = NULL
+    WHERE id = ANY(%s::uuid[]) AND status = 'processing'
+"""
+
+# Manual confidence override from the API
+UPDATE_INSIGHT_CONFIDENCE_SQL = """
+    UPDATE insights 
+    SET confidence_score = %s
+    WHERE id = %s
+"""
+
 class DatabaseManager:
     """Manages PostgreSQL database connections and operations."""
     
@@ -20,112 +407,258 @@ class DatabaseManager:
         self.connection_string = os.getenv('DATABASE_URL') or os.getenv('POSTGRES_URL')
         if not self.connection_string:
             raise ValueError("DATABASE_URL or POSTGRES_URL environment variable required")
+        
+        # Reuse connections across calls instead of a new handshake per query
+        self.pool = ConnectionPool(
+            self.connection_string,
+            check=ConnectionPool.check_connection,
+            open=True,
+            **pool_settings()
+        )
+        # Dedicated autocommit connection for LISTEN; opened on first wait_for_job
+        self._listen_conn = None
+        # Whether RECENT_INSIGHTS_VIEW exists; checked on first use
+        self._recent_view_available = None
+        # Set by insight writes; cleared by refresh_recent_insights_view_if_due
+        self._recent_view_stale = False
+        self._recent_view_refreshed_at = 0.0
+        # Whether the backend handles FOR UPDATE SKIP LOCKED well; checked on first claim
+        self._use_skip_locked = None
+        # Connection pinned to the current thread by pipeline()
+        self._pinned = threading.local()
+        # file_id -> file_path for files already fetched in the current job
+        self._file_path_cache: Dict[str, Optional[str]] = {}
     
     def get_connection(self):
-        """Get database connection."""
+        """Get a pooled database connection (use as a context manager)."""
+        pinned = getattr(self._pinned, 'conn', None)
+        if pinned is not None:
+            return nullcontext(pinned)
         try:
-            conn = psycopg.connect(
-                self.connection_string,
-                row_factory=dict_row
-            )
-            return conn
+            return self.pool.connection()
         except Exception as e:
-            logger.error(f"❌ Database connection failed: {e}")
+            logger.error("❌ Database connection failed: %s", e)
             raise
     
+    def in_pipeline(self) -> bool:
+        """Whether this thread is inside a pipeline() block."""
+        return getattr(self._pinned, 'conn', None) is not None
+    
+    @contextmanager
+    def pipeline(self):
+        """Run the enclosed DatabaseManager calls on one connection in pipeline mode.
+
+        Statements issued inside the block share a single transaction and are
+        sent without waiting for each result, so a sequence of writes costs one
+        round-trip. Write methods called inside the block raise instead of
+        logging and swallowing errors, and statement errors surface when the
+        block exits, so callers must handle exceptions around the whole block
+        and report success only after it. Do not stream with iter_file_data
+        inside the block.
+        """
+        if self.in_pipeline():
+            yield self._pinned.conn
+            return
+        
+        with self.pool.connection() as conn:
+            with conn.pipeline():
+                self._pinned.conn = conn
+                try:
+                    yield conn
+                finally:
+                    self._pinned.conn = None
+    
+    def close(self):
+        """Close all pooled connections."""
+        self._close_listener()
+        self.pool.close()
+    
+    def _close_listener(self):
+        if self._listen_conn is not None:
+            try:
+                self._listen_conn.close()
+            except Exception:
+                pass
+            self._listen_conn = None
+    
+    def wait_for_job(self, timeout: float) -> bool:
+        """Block until a new job is announced via NOTIFY or the timeout elapses.
+        
+        Returns True when woken by a notification. Falls back to sleeping for
+        the timeout if the listener connection cannot be used.
+        """
+        try:
+            if self._listen_conn is None or self._listen_conn.closed:
+                self._listen_conn = psycopg.connect(self.connection_string, autocommit=True, **KEEPALIVE_SETTINGS)
+                self._listen_conn.execute(f"LISTEN {JOB_NOTIFY_CHANNEL}")
+            
+            for _ in self._listen_conn.notifies(timeout=timeout, stop_after=1):
+                return True
+            return False
+            
+        except Exception as e:
+            logger.warning("⚠️ Job listener unavailable, falling back to polling: %s", e)
+            self._close_listener()
+            time.sleep(timeout)
+            return False
+    
+    def _supports_skip_locked(self, cursor) -> bool:
+        """Detect once whether to claim jobs with SKIP LOCKED (vanilla Postgres) or atomically."""
+        if self._use_skip_locked is None:
+            cursor.execute("SELECT version() AS version")
+            version = cursor.fetchone()['version']
+            self._use_skip_locked = 'CockroachDB' not in version
+            if not self._use_skip_locked:
+                logger.info("🪳 CockroachDB detected, claiming jobs without SKIP LOCKED")
+        return self._use_skip_locked
+    
     def get_pending_job(self) -> Optional[Dict[str, Any]]:
         """Get the next pending job from the queue."""
+        jobs = self.get_pending_jobs(1)
+        return jobs[0] if jobs else None
+    
+    def get_pending_jobs(self, batch_size: int) -> List[Dict[str, Any]]:
+        """Claim up to batch_size pending jobs in one round-trip, oldest first."""
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    # Get next pending job and mark as processing
-                    cursor.execute("""
-                        UPDATE processing_jobs 
-                        SET status = 'processing', 
-                            started_at = CURRENT_TIMESTAMP
-                        WHERE id = (
-                            SELECT id FROM processing_jobs 
-                            WHERE status = 'pending' 
-                            ORDER BY created_at ASC 
-                            LIMIT 1 
-                            FOR UPDATE SKIP LOCKED
-                        )
-                        RETURNING id, file_id, job_type, metadata, created_at;
-                    """)
+                    # Get next pending jobs and mark them as processing
+                    claim_sql = CLAIM_JOBS_SQL if self._supports_skip_locked(cursor) else CLAIM_JOBS_ATOMIC_SQL
+                    cursor.execute(claim_sql, (batch_size,), binary=True)
                     
-                    result = cursor.fetchone()
-                    if result:
-                        # Adapt to our expected format
-                        adapted_job = {
+                    # Adapt to our expected format
+                    jobs = []
+                    for result in sorted(cursor.fetchall(), key=lambda row: row['created_at']):
+                        if result['file_id']:
+                            # Paths came back with the claim, so get_file_paths needs no query
+                            self._file_path_cache[str(result['file_id'])] = result['file_path']
+                        jobs.append({
                             'job_id': str(result['id']),
                             'file_ids': [str(result['file_id'])] if result['file_id'] else [],
+                            'business_description': result['business_description'] or result['job_type'] or 'General business analysis',
                             'priority': 1,  # Default priority
                             'metadata': result.get('metadata', {}),
                             'created_at': result['created_at']
-                        }
-                        logger.info(f"📋 Retrieved job: {adapted_job['job_id']}")
-                        return adapted_job
-                    return None
+                        })
+                        logger.info("📋 Retrieved job: %s", result['id'])
+                    return jobs
                     
         except Exception as e:
-            logger.error(f"❌ Error getting pending job: {e}")
-            return None
+            logger.error("❌ Error getting pending jobs: %s", e)
+            return []
     
-    def get_file_data(self, file_ids: List[str]) -> List[Dict[str, Any]]:
-        """Get file data and metadata from file IDs."""
+    def iter_file_data(self, file_ids: List[str]) -> Iterator[Dict[str, Any]]:
+        """Stream file data and metadata one row at a time through a server-side cursor.
+
+        Only one file's bytea payload is held in memory at a time. The pooled
+        connection stays checked out until the iterator is exhausted or closed.
+        """
+        with self.get_connection() as conn:
+            # Binary results deliver bytea as raw bytes instead of hex text (half the wire size, no decode)
+            with conn.cursor(name='file_data_cursor', row_factory=class_row(FileRow), binary=True) as cursor:
+                cursor.itersize = 1
+                cursor.execute(FILE_DATA_SQL, (file_ids,))
+                
+                for row in cursor:
+                    self._file_path_cache[str(row.id)] = row.file_path
+                    yield {
+                        'id': str(row.id),
+                        'filename': row.filename,
+                        'original_name': row.original_name,
+                        'file_path': row.file_path,  # Keep for backward compatibility
+                        'file_data': row.file_data,  # New bytea data
+                        'mime_type': row.mime_type,
+                        'file_size': row.file_size
+                    }
+
+    def claim_job_with_files(self) -> Optional[Dict[str, Any]]:
+        """Claim the next pending job together with its file data in one round-trip.
+
+        The returned job carries a 'files' list of file objects (see get_file_data),
+        so the worker can skip the separate file lookup.
+        """
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT id, filename, original_name, file_path, file_data, mime_type, file_size
-                        FROM files 
-                        WHERE id = ANY(%s) AND status = 'uploaded'
-                    """, (file_ids,))
-                    
-                    results = cursor.fetchall()
-                    file_objects = []
-                    
-                    for row in results:
-                        file_obj = {
-                            'id': str(row['id']),
+                    if not self._supports_skip_locked(cursor):
+                        job = self.get_pending_job()
+                        if job:
+                            job['files'] = self.get_file_data(job['file_ids'])
+                        return job
+                    
+                    cursor.execute(CLAIM_JOB_WITH_FILES_SQL, binary=True)
+                    row = cursor.fetchone()
+                    if not row:
+                        return None
+                    
+                    job = {
+                        'job_id': str(row['id']),
+                        'file_ids': [str(row['file_id'])] if row['file_id'] else [],
+                        'business_description': row['business_description'] or row['job_type'] or 'General business analysis',
+                        'priority': 1,  # Default priority
+                        'metadata': row.get('metadata', {}),
+                        'created_at': row['created_at'],
+                        'files': []
+                    }
+                    if row['filename'] is not None:
+                        self._file_path_cache[str(row['file_id'])] = row['file_path']
+                        job['files'].append({
+                            'id': str(row['file_id']),
                             'filename': row['filename'],
                             'original_name': row['original_name'],
-                            'file_path': row['file_path'],  # Keep for backward compatibility
-                            'file_data': row['file_data'],  # New bytea data
+                            'file_path': row['file_path'],
+                            'file_data': row['file_data'],
                             'mime_type': row['mime_type'],
                             'file_size': row['file_size']
-                        }
-                        file_objects.append(file_obj)
+                        })
+                    logger.info("📋 Retrieved job: %s (%s file(s))", job['job_id'], len(job['files']))
+                    return job
                     
-                    logger.info(f"📁 Found {len(file_objects)} files for IDs: {file_ids}")
-                    return file_objects
+        except Exception as e:
+            logger.error("❌ Error claiming job with files: %s", e)
+            return None
+
+    def get_file_data(self, file_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get file data and metadata from file IDs."""
+        try:
+            file_objects = list(self.iter_file_data(file_ids))
+            logger.info("📁 Found %s files for IDs: %s", len(file_objects), file_ids)
+            return file_objects
                     
         except Exception as e:
-            logger.error(f"❌ Error getting file data: {e}")
+            logger.error("❌ Error getting file data: %s", e)
             return []
 
+    def clear_file_cache(self):
+        """Forget file paths remembered from earlier lookups; call once per job."""
+        self._file_path_cache = {}
+
     def get_file_paths(self, file_ids: List[str]) -> List[str]:
-        """Get file paths from file IDs (legacy method for backward compatibility)."""
+        """Get file paths from file IDs (legacy method for backward compatibility).
+
+        Files already fetched for the current job are answered from memory; only
+        the remaining IDs are queried.
+        """
         try:
-            file_objects = self.get_file_data(file_ids)
-            file_paths = []
+            missing = [file_id for file_id in file_ids if file_id not in self._file_path_cache]
+            if missing:
+                with self.get_connection() as conn:
+                    with conn.cursor() as cursor:
+                        # Paths only: never pull the bytea payload just to discard it
+                        cursor.execute(FILE_PATHS_SQL, (missing,))
+                        for row in cursor.fetchall():
+                            self._file_path_cache[str(row['id'])] = row['file_path']
             
-            for file_obj in file_objects:
-                # If file_data exists, we'll need to create temporary files
-                if file_obj['file_data']:
-                    # For now, return the original file path if it exists
-                    if file_obj['file_path']:
-                        file_paths.append(file_obj['file_path'])
-                else:
-                    # Fallback to file_path if file_data is not available
-                    if file_obj['file_path']:
-                        file_paths.append(file_obj['file_path'])
-                    
-            logger.info(f"📁 Found {len(file_paths)} file paths for IDs: {file_ids}")
+            file_paths = [
+                self._file_path_cache[file_id]
+                for file_id in file_ids
+                if self._file_path_cache.get(file_id)
+            ]
+            logger.info("📁 Found %s file paths for IDs: %s", len(file_paths), file_ids)
             return file_paths
                     
         except Exception as e:
-            logger.error(f"❌ Error getting file paths: {e}")
+            logger.error("❌ Error getting file paths: %s", e)
             return []
     
     def update_job_status(self, job_id: str, status: str, error_message: str = None):
@@ -134,129 +667,118 @@ class DatabaseManager:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
                     if status == 'completed':
-                        cursor.execute("""
-                            UPDATE processing_jobs 
-                            SET status = %s, 
-                                completed_at = CURRENT_TIMESTAMP, 
-                                error_message = %s
-                            WHERE id = %s
-                        """, (status, error_message, job_id))
+                        cursor.execute(COMPLETE_JOB_SQL, (status, error_message, job_id))
                     elif status == 'failed':
-                        cursor.execute("""
-                            UPDATE processing_jobs 
-                            SET status = %s, 
-                                error_message = %s, 
-                                retry_count = retry_count + 1
-                            WHERE id = %s
-                        """, (status, error_message, job_id))
+                        cursor.execute(FAIL_JOB_SQL, (status, error_message, job_id))
+                    elif error_message is not None:
+                        cursor.execute(SET_JOB_STATUS_WITH_ERROR_SQL, (status, error_message, job_id))
                     else:
-                        cursor.execute("""
-                            UPDATE processing_jobs 
-                            SET status = %s, 
-                                error_message = %s
-                            WHERE id = %s
-                        """, (status, error_message, job_id))
-                    
-                    logger.info(f"✅ Updated job {job_id} status to: {status}")
+                        # Leave error_message untouched so the row only changes where it must
+                        cursor.execute(SET_JOB_STATUS_SQL, (status, job_id))
+            
+            # Pipelined statements have only been queued; the caller reports the outcome
+            if not self.in_pipeline():
+                logger.info("✅ Updated job %s status to: %s", job_id, status)
                     
         except Exception as e:
-            logger.error(f"❌ Error updating job status: {e}")
+            if self.in_pipeline():
+                raise
+            logger.error("❌ Error updating job status: %s", e)
     
     def save_analysis_results(self, job_id: str, results: Dict[str, Any]):
         """Save analysis results to database as a single row per job."""
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    # Get file_id for this job
-                    cursor.execute("""
-                        SELECT file_id FROM processing_jobs WHERE id = %s
-                    """, (job_id,))
-                    job_result = cursor.fetchone()
-                    file_id = job_result['file_id'] if job_result else None
-                    
                     # Get all insights for this job
                     insights = results.get('final_insights', [])
                     
                     if not insights:
-                        logger.warning(f"⚠️ No insights to save for job {job_id}")
+                        logger.warning("⚠️ No insights to save for job %s", job_id)
                         return
                     
                     # Calculate overall confidence score (average of all insights)
-                    total_confidence = 0
-                    confidence_count = 0
-                    
-                    for insight in insights:
-                        confidence = self._extract_confidence_score(insight)
-                        total_confidence += confidence
-                        confidence_count += 1
-                    
-                    overall_confidence = total_confidence / confidence_count if confidence_count > 0 else 0.7
-                    
-                    # Prepare comprehensive metadata
-                    metadata = {
-                        'total_insights': len(insights),
-                        'insight_types': [insight.get('title', 'General Analysis') for insight in insights],
-                        'analysis_summary': {
-                            'total_metrics': sum(len(insight.get('metrics', {})) for insight in insights),
-                            'total_findings': sum(len(insight.get('key_findings', [])) for insight in insights),
-                            'total_recommendations': sum(len(insight.get('recommendations', [])) for insight in insights),
-                            'total_visualizations': sum(len(insight.get('visualizations', [])) for insight in insights)
-                        },
-                        'execution_info': {
-                            'generated_at': insights[0].get('generated_at') if insights else None,
-                            'status': 'success' if all(insight.get('status') != 'error' for insight in insights) else 'partial_success'
-                        }
-                    }
+                    overall_confidence = fmean(map(self._extract_confidence_score, insights))
                     
                     # Create insight type summary (comma-separated list of main insights)
                     insight_type_summary = ', '.join([insight.get('title', 'General Analysis') for insight in insights[:3]])
                     if len(insights) > 3:
                         insight_type_summary += f' (+{len(insights) - 3} more)'
                     
-                    # Save all insights as single row
-                    cursor.execute("""
-                        INSERT INTO insights (
-                            job_id, 
-                            file_id, 
-                            insight_type, 
-                            content, 
-                            confidence_score, 
-                            metadata, 
-                            created_at
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-                    """, (
-                        job_id,
-                        file_id,
-                        insight_type_summary,
-                        safe_json_dumps({
+                    # Save all insights as single row; metadata aggregates are computed
+                    # by Postgres from the content payload
+                    cursor.execute(SAVE_ANALYSIS_RESULTS_SQL, {
+                        'job_id': job_id,
+                        'insight_type': insight_type_summary,
+                        'content': Jsonb({
                             'final_insights': insights,
                             'summary': {
                                 'total_insights': len(insights),
                                 'overall_confidence': overall_confidence,
                                 'analysis_complete': True
                             }
-                        }),
-                        overall_confidence,
-                        safe_json_dumps(metadata)
-                    ))
+                        }, dumps=safe_json_dumps),
+                        'confidence_score': overall_confidence
+                    })
+            
+            self._recent_view_stale = True
+            if not self.in_pipeline():
+                logger.info("💾 Saved complete analysis with %s insights for job %s (confidence: %.2f)", len(insights), job_id, overall_confidence)
                     
-                    logger.info(f"💾 Saved complete analysis with {len(insights)} insights for job {job_id} (confidence: {overall_confidence:.2f})")
+        except Exception as e:
+            if self.in_pipeline():
+                raise
+            logger.error("❌ Error saving results: %s", e)
+    
+    def save_analysis_results_rows(self, job_id: str, results: Dict[str, Any]):
+        """Save analysis results as one row per insight, bulk-loaded with COPY."""
+        try:
+            insights = results.get('final_insights', [])
+            
+            if not insights:
+                logger.warning("⚠️ No insights to save for job %s", job_id)
+                return
+            
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(JOB_FILE_ID_SQL, (job_id,))
+                    job = cursor.fetchone()
+                    file_id = job['file_id'] if job else None
+                    
+                    with cursor.copy(COPY_INSIGHT_ROWS_SQL) as copy:
+                        for insight in insights:
+                            copy.write_row((
+                                job_id,
+                                file_id,
+                                insight.get('title', 'General Analysis'),
+                                Jsonb(insight, dumps=safe_json_dumps),
+                                self._extract_confidence_score(insight),
+                                Jsonb({
+                                    'execution_info': {
+                                        'generated_at': insight.get('generated_at'),
+                                        'status': insight.get('status', 'success')
+                                    }
+                                }, dumps=safe_json_dumps)
+                            ))
+                    
+            self._recent_view_stale = True
+            if not self.in_pipeline():
+                logger.info("💾 Saved %s insight rows for job %s", len(insights), job_id)
                     
         except Exception as e:
-            logger.error(f"❌ Error saving results: {e}")
+            if self.in_pipeline():
+                raise
+            logger.error("❌ Error saving insight rows: %s", e)
     
     def _extract_confidence_score(self, insight: Dict[str, Any]) -> float:
         """Extract confidence score from insight data."""
         # Try various possible keys for confidence score
-        confidence_keys = ['confidence', 'confidence_score', 'score', 'certainty']
-        
-        for key in confidence_keys:
-            if key in insight and isinstance(insight[key], (int, float)):
-                score = float(insight[key])
+        for key in CONFIDENCE_KEYS:
+            score = insight.get(key)
+            if isinstance(score, (int, float)):
                 # Ensure score is between 0 and 1
                 if 0 <= score <= 1:
-                    return score
+                    return float(score)
                 elif 0 <= score <= 100:  # Convert percentage to decimal
                     return score / 100
         
@@ -268,25 +790,41 @@ class DatabaseManager:
         else:
             return 0.7   # Medium confidence as default
     
+    def fail_or_retry_job(self, job_id: str, error_message: str) -> bool:
+        """Record a job failure, requeueing it if it has retries left.
+
+        One conditional UPDATE both bumps retry_count and picks the next status,
+        so there is no window between checking and resetting the job.
+
+        Returns:
+            True if the job was put back to pending, False if it failed permanently
+        """
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(FAIL_OR_RETRY_JOB_SQL, {'job_id': job_id, 'error_message': error_message, 'max_retries': MAX_JOB_RETRIES})
+                    
+                    result = cursor.fetchone()
+                    return bool(result) and result['status'] == 'pending'
+                    
+        except Exception as e:
+            logger.error("❌ Error recording job failure: %s", e)
+            return False
+    
     def should_retry_job(self, job_id: str) -> bool:
         """Check if a failed job should be retried."""
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT retry_count 
-                        FROM processing_jobs 
-                        WHERE id = %s
-                    """, (job_id,))
+                    cursor.execute(JOB_RETRY_COUNT_SQL, (job_id,))
                     
                     result = cursor.fetchone()
                     if result:
-                        # Allow up to 3 retries
-                        return result['retry_count'] < 3
+                        return result['retry_count'] < MAX_JOB_RETRIES
                     return False
                     
         except Exception as e:
-            logger.error(f"❌ Error checking retry status: {e}")
+            logger.error("❌ Error checking retry status: %s", e)
             return False
     
     def reset_job_to_pending(self, job_id: str):
@@ -294,62 +832,52 @@ class DatabaseManager:
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        UPDATE processing_jobs 
-                        SET status = 'pending', started_at = NULL, error_message = NULL
-                        WHERE id = %s
-                    """, (job_id,))
+                    cursor.execute(RESET_JOB_SQL, (job_id,))
+                    
+                    logger.info("🔄 Reset job %s to pending for retry", job_id)
+                    
+        except Exception as e:
+            logger.error("❌ Error resetting job: %s", e)
+    
+    def release_jobs(self, job_ids: List[str]) -> int:
+        """Put claimed jobs that are still processing back to pending, without using a retry.
+
+        Returns:
+            Number of jobs released
+        """
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(RELEASE_JOBS_SQL, (job_ids,))
                     
-                    logger.info(f"🔄 Reset job {job_id} to pending for retry")
+                    if cursor.rowcount:
+                        logger.info("↩️  Released %s unprocessed job(s) back to pending", cursor.rowcount)
+                    return cursor.rowcount
                     
         except Exception as e:
-            logger.error(f"❌ Error resetting job: {e}")
+            logger.error("❌ Error releasing jobs: %s", e)
+            return 0
     
     def get_insights_by_job_id(self, job_id: str) -> Dict[str, Any]:
         """Retrieve insights for a specific job (single row with all insights)."""
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT 
-                            id,
-                            job_id,
-                            file_id,
-                            insight_type,
-                            content,
-                            confidence_score,
-                            metadata,
-                            created_at
-                        FROM insights 
-                        WHERE job_id = %s 
-                        ORDER BY created_at DESC
-                        LIMIT 1
-                    """, (job_id,))
+                    # Postgres builds the response object; content holds all insights in final_insights
+                    cursor.execute(INSIGHTS_BY_JOB_SQL, (job_id,), binary=True)
                     
                     result = cursor.fetchone()
                     
                     if result:
-                        insight_record = {
-                            'id': str(result['id']),
-                            'job_id': str(result['job_id']),
-                            'file_id': str(result['file_id']) if result['file_id'] else None,
-                            'insight_type': result['insight_type'],
-                            'content': result['content'],  # Contains all insights in final_insights array
-                            'confidence_score': float(result['confidence_score']) if result['confidence_score'] else 0.0,
-                            'metadata': result['metadata'] if result['metadata'] else {},
-                            'created_at': result['created_at'].isoformat() if result['created_at'] else None,
-                            'individual_insights': result['content'].get('final_insights', []) if result['content'] else [],
-                            'summary': result['content'].get('summary', {}) if result['content'] else {}
-                        }
-                        
-                        logger.info(f"📊 Retrieved insights for job {job_id} with {len(insight_record['individual_insights'])} individual insights")
+                        insight_record = result['insight_record']
+                        logger.info("📊 Retrieved insights for job %s with %s individual insights", job_id, len(insight_record['individual_insights']))
                         return insight_record
                     else:
-                        logger.info(f"📊 No insights found for job {job_id}")
+                        logger.info("📊 No insights found for job %s", job_id)
                         return {}
                     
         except Exception as e:
-            logger.error(f"❌ Error retrieving insights: {e}")
+            logger.error("❌ Error retrieving insights: %s", e)
             return {}
     
     def get_insights_by_file_id(self, file_id: str) -> List[Dict[str, Any]]:
@@ -357,94 +885,71 @@ class DatabaseManager:
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT 
-                            i.id,
-                            i.job_id,
-                            i.file_id,
-                            i.insight_type,
-                            i.content,
-                            i.confidence_score,
-                            i.metadata,
-                            i.created_at,
-                            pj.job_type
-                        FROM insights i
-                        JOIN processing_jobs pj ON i.job_id = pj.id
-                        WHERE i.file_id = %s 
-                        ORDER BY i.created_at DESC
-                    """, (file_id,))
-                    
-                    results = cursor.fetchall()
-                    insights = []
-                    
-                    for row in results:
-                        insight = {
-                            'id': str(row['id']),
-                            'job_id': str(row['job_id']),
-                            'file_id': str(row['file_id']) if row['file_id'] else None,
-                            'insight_type': row['insight_type'],
-                            'content': row['content'],
-                            'confidence_score': float(row['confidence_score']) if row['confidence_score'] else 0.0,
-                            'metadata': row['metadata'] if row['metadata'] else {},
-                            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                            'job_type': row['job_type']
-                        }
-                        insights.append(insight)
-                    
-                    logger.info(f"📊 Retrieved {len(insights)} insights for file {file_id}")
+                    cursor.execute(INSIGHTS_BY_FILE_SQL, (file_id,), binary=True)
+                    
+                    insights = cursor.fetchone()['insights']
+                    
+                    logger.info("📊 Retrieved %s insights for file %s", len(insights), file_id)
                     return insights
                     
         except Exception as e:
-            logger.error(f"❌ Error retrieving insights by file: {e}")
+            logger.error("❌ Error retrieving insights by file: %s", e)
             return []
     
+    def _has_recent_insights_view(self, cursor) -> bool:
+        if self._recent_view_available is None:
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL AS available", (RECENT_INSIGHTS_VIEW,))
+            self._recent_view_available = cursor.fetchone()['available']
+        return self._recent_view_available
+    
+    def refresh_recent_insights_view(self) -> bool:
+        """Refresh the recent-insights materialized view; returns False if the refresh failed."""
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    if self._has_recent_insights_view(cursor):
+                        cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {RECENT_INSIGHTS_VIEW}")
+            return True
+        except Exception as e:
+            logger.warning("⚠️ Error refreshing %s: %s", RECENT_INSIGHTS_VIEW, e)
+            return False
+    
+    def refresh_recent_insights_view_if_due(self) -> bool:
+        """Refresh the view if insight writes made it stale and the refresh interval has passed.
+
+        Called from worker loops between jobs so the refresh runs in its own
+        transaction, off the write path; many writes collapse into one refresh.
+        """
+        if not self._recent_view_stale or self.in_pipeline():
+            return False
+        if time.monotonic() - self._recent_view_refreshed_at < RECENT_INSIGHTS_REFRESH_INTERVAL:
+            return False
+        
+        self._recent_view_stale = False
+        self._recent_view_refreshed_at = time.monotonic()
+        if not self.refresh_recent_insights_view():
+            # Try again on a later pass
+            self._recent_view_stale = True
+            return False
+        return True
+    
     def get_recent_insights(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Retrieve recent insights across all jobs."""
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT 
-                            i.id,
-                            i.job_id,
-                            i.file_id,
-                            i.insight_type,
-                            i.content,
-                            i.confidence_score,
-                            i.metadata,
-                            i.created_at,
-                            pj.job_type,
-                            f.original_name as file_name
-                        FROM insights i
-                        JOIN processing_jobs pj ON i.job_id = pj.id
-                        LEFT JOIN files f ON i.file_id = f.id
-                        ORDER BY i.created_at DESC
-                        LIMIT %s
-                    """, (limit,))
-                    
-                    results = cursor.fetchall()
-                    insights = []
-                    
-                    for row in results:
-                        insight = {
-                            'id': str(row['id']),
-                            'job_id': str(row['job_id']),
-                            'file_id': str(row['file_id']) if row['file_id'] else None,
-                            'insight_type': row['insight_type'],
-                            'content': row['content'],
-                            'confidence_score': float(row['confidence_score']) if row['confidence_score'] else 0.0,
-                            'metadata': row['metadata'] if row['metadata'] else {},
-                            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                            'job_type': row['job_type'],
-                            'file_name': row['file_name']
-                        }
-                        insights.append(insight)
-                    
-                    logger.info(f"📊 Retrieved {len(insights)} recent insights")
+                    if self._has_recent_insights_view(cursor):
+                        cursor.execute(RECENT_INSIGHTS_FROM_VIEW_SQL, (limit,), binary=True)
+                    else:
+                        cursor.execute(RECENT_INSIGHTS_LIVE_SQL, (limit,), binary=True)
+                    
+                    insights = cursor.fetchone()['insights']
+                    
+                    logger.info("📊 Retrieved %s recent insights", len(insights))
                     return insights
                     
         except Exception as e:
-            logger.error(f"❌ Error retrieving recent insights: {e}")
+            logger.error("❌ Error retrieving recent insights: %s", e)
             return []
     
     def update_insight_confidence(self, insight_id: str, confidence_score: float) -> bool:
@@ -452,19 +957,115 @@ class DatabaseManager:
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        UPDATE insights 
-                        SET confidence_score = %s
-                        WHERE id = %s
-                    """, (confidence_score, insight_id))
-                    
-                    if cursor.rowcount > 0:
-                        logger.info(f"✅ Updated confidence score for insight {insight_id}")
-                        return True
-                    else:
-                        logger.warning(f"⚠️ No insight found with ID {insight_id}")
-                        return False
+                    cursor.execute(UPDATE_INSIGHT_CONFIDENCE_SQL, (confidence_score, insight_id))
+                    updated = cursor.rowcount > 0
+            
+            if updated:
+                logger.info("✅ Updated confidence score for insight %s", insight_id)
+                self._recent_view_stale = True
+                return True
+            else:
+                logger.warning("⚠️ No insight found with ID %s", insight_id)
+                return False
                     
         except Exception as e:
-            logger.error(f"❌ Error updating insight confidence: {e}")
+            logger.error("❌ Error updating insight confidence: %s", e)
             return False
+
+
+class AsyncDatabaseManager:
+    """Coroutine-native read access to insights for the FastAPI endpoints.
+
+    Uses psycopg's async connections so API requests wait on Postgres without
+    blocking the event loop or occupying an executor thread. Call open() from an
+    async startup hook before use.
+    """
+    
+    def __init__(self):
+        self.connection_string = os.getenv('DATABASE_URL') or os.getenv('POSTGRES_URL')
+        if not self.connection_string:
+            raise ValueError("DATABASE_URL or POSTGRES_URL environment variable required")
+        
+        self.pool = AsyncConnectionPool(
+            self.connection_string,
+            check=AsyncConnectionPool.check_connection,
+            open=False,
+            **pool_settings()
+        )
+        # Whether RECENT_INSIGHTS_VIEW exists; checked on first use
+        self._recent_view_available = None
+    
+    async def open(self):
+        """Open the connection pool (must run inside the event loop)."""
+        await self.pool.open()
+    
+    async def close(self):
+        """Close all pooled connections."""
+        await self.pool.close()
+    
+    async def get_insights_by_job_id(self, job_id: str) -> Dict[str, Any]:
+        """Retrieve insights for a specific job (single row with all insights)."""
+        try:
+            async with self.pool.connection() as conn:
+                cursor = await conn.execute(INSIGHTS_BY_JOB_SQL, (job_id,), binary=True)
+                result = await cursor.fetchone()
+                return result['insight_record'] if result else {}
+                
+        except Exception as e:
+            logger.error("❌ Error retrieving insights: %s", e)
+            return {}
+    
+    async def get_insights_by_file_id(self, file_id: str) -> List[Dict[str, Any]]:
+        """Retrieve all insights for a specific file."""
+        try:
+            async with self.pool.connection() as conn:
+                cursor = await conn.execute(INSIGHTS_BY_FILE_SQL, (file_id,), binary=True)
+                return (await cursor.fetchone())['insights']
+                
+        except Exception as e:
+            logger.error("❌ Error retrieving insights by file: %s", e)
+            return []
+    
+    async def _has_recent_insights_view(self, conn) -> bool:
+        if self._recent_view_available is None:
+            cursor = await conn.execute("SELECT to_regclass(%s) IS NOT NULL AS available", (RECENT_INSIGHTS_VIEW,))
+            self._recent_view_available = (await cursor.fetchone())['available']
+        return self._recent_view_available
+    
+    async def get_recent_insights(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Retrieve recent insights across all jobs."""
+        try:
+            async with self.pool.connection() as conn:
+                sql = RECENT_INSIGHTS_FROM_VIEW_SQL if await self._has_recent_insights_view(conn) else RECENT_INSIGHTS_LIVE_SQL
+                cursor = await conn.execute(sql, (limit,), binary=True)
+                return (await cursor.fetchone())['insights']
+                
+        except Exception as e:
+            logger.error("❌ Error retrieving recent insights: %s", e)
+            return []
+    
+    async def iter_recent_insights(self, limit: int = 50, batch_size: int = 100) -> AsyncIterator[str]:
+        """Stream recent insights as serialized JSON objects, newest first.
+
+        Rows come through a server-side cursor batch_size at a time, already
+        rendered to JSON text by Postgres, so nothing is decoded in Python.
+        """
+        async with self.pool.connection() as conn:
+            sql = RECENT_INSIGHT_ROWS_FROM_VIEW_SQL if await self._has_recent_insights_view(conn) else RECENT_INSIGHT_ROWS_LIVE_SQL
+            async with conn.cursor(name='recent_insights_cursor') as cursor:
+                cursor.itersize = batch_size
+                await cursor.execute(sql, (limit,))
+                async for row in cursor:
+                    yield row['insight']
+    
+    async def get_insights_stats(self) -> Dict[str, Any]:
+        """Aggregate insight statistics (totals, per-type counts, confidence, recent activity)."""
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(INSIGHTS_STATS_SQL, binary=True)
+            row = await cursor.fetchone()
+            return {
+                "total_insights": row['total'],
+                "insights_by_type": row['insights_by_type'],
+                "average_confidence": row['avg_confidence'] or 0.0,
+                "recent_insights_7_days": row['recent_count']
+            }
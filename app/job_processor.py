@@ -2,9 +2,10 @@
 Job processor for monitoring and processing analysis jobs
 """
 import asyncio
-import time
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 from .database import DatabaseManager
 from .ai_workflow import run_complete_workflow
@@ -15,11 +16,14 @@ logger = setup_logger(__name__)
 class JobProcessor:
     """Processes analysis jobs from the database queue."""
     
-    def __init__(self, poll_interval: int = 5):
-        self.db = DatabaseManager()
+    def __init__(self, poll_interval: int = 5, prefetch_size: int = 1, db: Optional[DatabaseManager] = None):
+        # Share an existing manager (and its pool) when given one
+        self.db = db or DatabaseManager()
         self.poll_interval = poll_interval
+        self.prefetch_size = prefetch_size  # Jobs claimed per dequeue round-trip
         self.running = False
-        logger.info(f"🔧 Job processor initialized (poll interval: {poll_interval}s)")
+        self._stop = threading.Event()  # Set by stop_monitoring to wake the loop immediately
+        logger.info("🔧 Job processor initialized (poll interval: %ss, prefetch: %s)", poll_interval, prefetch_size)
     
     def process_single_job(self, job: Dict[str, Any]) -> bool:
         """Process a single analysis job."""
@@ -27,74 +31,99 @@ class JobProcessor:
         business_description = job['business_description']
         file_ids = job['file_ids']
         
-        logger.info(f"⚡ Processing job {job_id}")
-        logger.info(f"   Business: {business_description[:100]}...")
-        logger.info(f"   Files: {len(file_ids)} file(s)")
+        logger.info("⚡ Processing job %s", job_id)
+        logger.info("   Business: %s...", business_description[:100])
+        logger.info("   Files: %s file(s)", len(file_ids))
         
         try:
-            # Get file paths from file IDs
-            file_paths = self.db.get_file_paths(file_ids)
+            # Use files fetched alongside the claim, otherwise look up paths by ID
+            files = job.get('files') or self.db.get_file_paths(file_ids)
             
-            if not file_paths:
+            if not files:
                 error_msg = f"No valid files found for IDs: {file_ids}"
-                logger.error(f"❌ {error_msg}")
+                logger.error("❌ %s", error_msg)
                 self.db.update_job_status(job_id, 'failed', error_msg)
                 return False
             
-            logger.info(f"📁 Processing {len(file_paths)} files")
+            logger.info("📁 Processing %s files", len(files))
             
             # Run the AI workflow
-            result = run_complete_workflow(file_paths, business_description)
+            result = run_complete_workflow(files, business_description)
             
             if result['status'] == 'success':
-                # Save results to database
-                self.db.save_analysis_results(job_id, result['data'])
-                self.db.update_job_status(job_id, 'completed')
+                # Save results and mark the job done in one pipelined round-trip; any
+                # statement error is raised when the block exits and is retried below
+                with self.db.pipeline():
+                    self.db.save_analysis_results(job_id, result['data'])
+                    self.db.update_job_status(job_id, 'completed')
                 
                 insights_count = len(result['data'].get('final_insights', []))
-                logger.info(f"✅ Job {job_id} completed successfully - {insights_count} insights generated")
+                logger.info("💾 Saved results and marked job %s completed", job_id)
+                logger.info("✅ Job %s completed successfully - %s insights generated", job_id, insights_count)
                 return True
             else:
                 error_msg = result.get('error', 'Unknown workflow error')
-                logger.error(f"❌ Workflow failed for job {job_id}: {error_msg}")
+                logger.error("❌ Workflow failed for job %s: %s", job_id, error_msg)
                 self.db.update_job_status(job_id, 'failed', error_msg)
                 return False
                 
         except Exception as e:
             error_msg = f"Job processing error: {str(e)}"
-            logger.error(f"❌ {error_msg}")
-            logger.error(f"Stack trace: {traceback.format_exc()}")
+            logger.error("❌ %s", error_msg)
+            logger.error("Stack trace: %s", traceback.format_exc())
             
-            # Check if we should retry
-            if self.db.should_retry_job(job_id):
-                logger.info(f"🔄 Job {job_id} will be retried")
-                self.db.reset_job_to_pending(job_id)
+            # Requeue or fail permanently in a single statement
+            if self.db.fail_or_retry_job(job_id, error_msg):
+                logger.info("🔄 Job %s will be retried", job_id)
             else:
-                logger.info(f"❌ Job {job_id} failed permanently (max retries reached)")
-                self.db.update_job_status(job_id, 'failed', error_msg)
+                logger.info("❌ Job %s failed permanently (max retries reached)", job_id)
             
             return False
     
     def run_once(self) -> bool:
         """Run one iteration of job processing."""
         try:
-            # Get next pending job
-            job = self.db.get_pending_job()
+            # Fold insight writes since the last pass into one view refresh, outside any job's transaction
+            self.db.refresh_recent_insights_view_if_due()
+            
+            # File paths remembered from the previous batch may be stale by now
+            self.db.clear_file_cache()
             
-            if job:
-                return self.process_single_job(job)
+            # Claim the next batch of pending jobs; a single job comes back with its files
+            if self.prefetch_size == 1:
+                job = self.db.claim_job_with_files()
+                jobs = [job] if job else []
             else:
+                jobs = self.db.get_pending_jobs(self.prefetch_size)
+            
+            if not jobs:
                 logger.debug("📭 No pending jobs found")
                 return False
+            
+            # Claimed jobs not yet worked; released in finally so a stop or crash mid-batch
+            # doesn't strand them in 'processing'
+            unfinished = [job['job_id'] for job in jobs]
+            any_succeeded = False
+            try:
+                for job in jobs:
+                    if self._stop.is_set():
+                        break
+                    any_succeeded = self.process_single_job(job) or any_succeeded
+                    unfinished.pop(0)
+            finally:
+                if unfinished:
+                    self.db.release_jobs(unfinished)
+            return any_succeeded
                 
         except Exception as e:
-            logger.error(f"❌ Error in job processing iteration: {e}")
+            logger.error("❌ Error in job processing iteration: %s", e)
             return False
     
     def start_monitoring(self):
         """Start continuous job monitoring."""
         logger.info("🚀 Starting job processor monitoring...")
         self.running = True
+        self._stop.clear()
         
         processed_count = 0
         
@@ -105,39 +134,50 @@ class JobProcessor:
                     
                     if job_processed:
                         processed_count += 1
-                        logger.info(f"📊 Total jobs processed: {processed_count}")
-                    
-                    # Sleep between iterations
-                    time.sleep(self.poll_interval)
+                        logger.info("📊 Total jobs processed: %s", processed_count)
+                    else:
+                        # Idle until a job is announced (poll_interval is the safety-net timeout)
+                        self.db.wait_for_job(self.poll_interval)
                     
                 except KeyboardInterrupt:
                     logger.info("⏹️  Received interrupt signal")
                     break
                 except Exception as e:
-                    logger.error(f"❌ Unexpected error in monitoring loop: {e}")
-                    time.sleep(self.poll_interval * 2)  # Wait longer after errors
+                    logger.error("❌ Unexpected error in monitoring loop: %s", e)
+                    if self._stop.wait(self.poll_interval * 2):  # Wait longer after errors
+                        break
                     
         except Exception as e:
-            logger.error(f"❌ Fatal error in job processor: {e}")
+            logger.error("❌ Fatal error in job processor: %s", e)
         finally:
             self.running = False
-            logger.info(f"🏁 Job processor stopped. Total processed: {processed_count}")
+            logger.info("🏁 Job processor stopped. Total processed: %s", processed_count)
     
     def stop_monitoring(self):
         """Stop job monitoring."""
         logger.info("⏹️  Stopping job processor...")
         self.running = False
+        self._stop.set()
 
 # Async version for integration with FastAPI
 class AsyncJobProcessor:
     """Async version of job processor for FastAPI integration."""
     
-    def __init__(self, poll_interval: int = 5):
-        self.processor = JobProcessor(poll_interval)
+    def __init__(self, poll_interval: int = 5, db: Optional[DatabaseManager] = None):
+        self.poll_interval = poll_interval
+        self.db = db
+        self.processor = None  # Created on start so importing this module opens no pool
         self.task = None
+        # One dedicated thread: jobs run serially, and the LISTEN connection and
+        # pooled connections are always used from the same thread
+        self._executor = None
     
     async def start_background_processing(self):
         """Start background job processing."""
+        if self.processor is None:
+            self.processor = JobProcessor(self.poll_interval, db=self.db)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-processor")
         if self.task is None or self.task.done():
             logger.info("🔄 Starting background job processing...")
             self.task = asyncio.create_task(self._run_background())
@@ -146,15 +186,17 @@ class AsyncJobProcessor:
         """Background processing loop."""
         while True:
             try:
-                # Run job processing in thread pool to avoid blocking
+                # Run job processing on the dedicated worker thread to avoid blocking
                 loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, self.processor.run_once)
-                await asyncio.sleep(self.processor.poll_interval)
+                job_processed = await loop.run_in_executor(self._executor, self.processor.run_once)
+                if not job_processed:
+                    # Idle until a job is announced instead of sleeping a fixed interval
+                    await loop.run_in_executor(self._executor, self.processor.db.wait_for_job, self.processor.poll_interval)
             except asyncio.CancelledError:
                 logger.info("🛑 Background processing cancelled")
                 break
             except Exception as e:
-                logger.error(f"❌ Error in background processing: {e}")
+                logger.error("❌ Error in background processing: %s", e)
                 await asyncio.sleep(self.processor.poll_interval * 2)
     
     def stop_background_processing(self):
@@ -162,8 +204,13 @@ class AsyncJobProcessor:
         if self.task and not self.task.done():
             logger.info("⏹️  Stopping background processing...")
             self.task.cancel()
+        if self._executor is not None:
+            # Let an in-flight job finish on its thread rather than abandoning it mid-write
+            self._executor.shutdown(wait=False)
+            self._executor = None
 
-# Global instance for FastAPI integration
+# Global instance for FastAPI integration; the app's startup hook sets
+# background_processor.db so a started processor shares the app's connection pool
 background_processor = AsyncJobProcessor()
 
 if __name__ == "__main__":
@@ -175,6 +222,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("👋 Shutting down job processor...")
     except Exception as e:
-        logger.error(f"❌ Fatal error: {e}")
+        logger.error("❌ Fatal error: %s", e)
     finally:
         processor.stop_monitoring()
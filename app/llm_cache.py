@@ -0,0 +1,78 @@
+"""
+In-memory response cache for repeated LLM prompts
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Union, List, Any, Tuple
+
+from .config import AZURE_DEPLOYMENT_NAME, LLM_TEMPERATURE
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Only reuse responses at the shipped low temperature, where completions for the
+# same prompt are near-identical; sampled settings above this bypass the cache
+CACHEABLE_MAX_TEMPERATURE = 0.1
+CACHE_ENABLED = LLM_TEMPERATURE <= CACHEABLE_MAX_TEMPERATURE
+MAX_CACHE_ENTRIES = 1024
+CACHE_TTL_SECONDS = 24 * 3600
+
+MODEL_KEY = f"{AZURE_DEPLOYMENT_NAME}-t{LLM_TEMPERATURE}"
+
+# key -> (stored_at, content)
+_response_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def render_prompt(prompt: Union[str, List[Any]]) -> str:
+    """Render a string prompt or a list of chat messages to text."""
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(f"{message.type}: {message.content}" for message in prompt)
+
+def hash_prompt(prompt: Union[str, List[Any]], model_key: str = MODEL_KEY) -> str:
+    """Return a stable cache key for a fully rendered prompt."""
+    return hashlib.sha256(f"{model_key}\n{render_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+def get_cached_response(key: str) -> Optional[str]:
+    """Look up a cached response, marking it as recently used; expired entries are dropped."""
+    with _cache_lock:
+        entry = _response_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, content = entry
+        if time.monotonic() - stored_at > CACHE_TTL_SECONDS:
+            del _response_cache[key]
+            return None
+        _response_cache.move_to_end(key)
+        return content
+
+def store_response(key: str, content: str) -> None:
+    """Store a response, evicting the least recently used entry when full."""
+    with _cache_lock:
+        _response_cache[key] = (time.monotonic(), content)
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > MAX_CACHE_ENTRIES:
+            _response_cache.popitem(last=False)
+
+def clear_response_cache() -> None:
+    """Drop all cached responses."""
+    with _cache_lock:
+        _response_cache.clear()
+
+async def cached_ainvoke(llm, prompt: Union[str, List[Any]]) -> str:
+    """Invoke the LLM and return its text, reusing responses for identical prompts."""
+    if not CACHE_ENABLED:
+        response = await llm.ainvoke(prompt)
+        return response.content
+
+    key = hash_prompt(prompt)
+    cached = get_cached_response(key)
+    if cached is not None:
+        logger.debug("♻️ LLM cache hit (%s)", key[:12])
+        return cached
+
+    response = await llm.ainvoke(prompt)
+    store_response(key, response.content)
+    return response.content
@@ -1,13 +1,19 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from typing import List
+import asyncio
+import shutil
 import tempfile
 import os
 
-from .ai_workflow import run_complete_workflow
+from .ai_workflow import run_complete_workflow_async
+from .analysis_engine import shutdown_analysis_pool
+from .workflow_nodes import close_llm_client
 from .config import validate_environment
 from .utils import setup_logger
-from .database import DatabaseManager
+from .database import DatabaseManager, AsyncDatabaseManager, RECENT_INSIGHTS_REFRESH_INTERVAL
+from .job_processor import background_processor
 
 # Setup
 logger = setup_logger(__name__)
@@ -16,10 +22,12 @@ app = FastAPI(title="Business Insights AI", version="1.0.0")
 # Initialize database manager (will be None if no database configured)
 try:
     db_manager = DatabaseManager()
+    async_db_manager = AsyncDatabaseManager()
     logger.info("✅ Database manager initialized")
 except Exception as e:
-    logger.warning(f"⚠️  Database not available: {e}")
+    logger.warning("⚠️  Database not available: %s", e)
     db_manager = None
+    async_db_manager = None
 
 # CORS middleware
 app.add_middleware(
@@ -30,12 +38,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Background task refreshing the recent-insights view after this process's own insight writes
+_view_refresh_task = None
+
+async def refresh_recent_insights_periodically():
+    """Refresh the recent-insights view off the request path once edits have made it stale."""
+    while True:
+        await asyncio.sleep(RECENT_INSIGHTS_REFRESH_INTERVAL)
+        try:
+            await asyncio.to_thread(db_manager.refresh_recent_insights_view_if_due)
+        except Exception as e:
+            logger.warning("⚠️ Recent insights refresh failed: %s", e)
+
 @app.on_event("startup")
 async def startup_event():
     """Validate environment on startup."""
+    global _view_refresh_task
     logger.info("🚀 Starting Business Insights AI...")
-    if not validate_environment():
-        logger.warning("⚠️  Some environment variables missing")
+    if async_db_manager:
+        await async_db_manager.open()
+    if db_manager:
+        # Share this process's pool if the in-process job processor is ever started
+        background_processor.db = db_manager
+        _view_refresh_task = asyncio.create_task(refresh_recent_insights_periodically())
+    env_check = validate_environment()
+    if not env_check:
+        logger.warning("⚠️  Some environment variables missing: %s", ", ".join(env_check.missing))
     
     # Job processing is now handled by separate cron system
     database_url = os.getenv('DATABASE_URL') or os.getenv('POSTGRES_URL')
@@ -53,6 +81,14 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("⏹️  Shutting down Business Insights AI...")
+    if _view_refresh_task:
+        _view_refresh_task.cancel()
+    shutdown_analysis_pool()
+    await close_llm_client()
+    if db_manager:
+        db_manager.close()
+    if async_db_manager:
+        await async_db_manager.close()
     logger.info("💡 Job processing runs independently via cron system")
     logger.info("👋 Shutdown complete")
 
@@ -65,33 +101,52 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Uploads are copied to disk in chunks of this size instead of read whole
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+def save_upload_to_temp(upload: UploadFile) -> str:
+    """Copy an uploaded file to a temp file chunk by chunk (blocking; run off the event loop)."""
+    fd, path = tempfile.mkstemp(suffix=f"_{upload.filename}")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            upload.file.seek(0)
+            shutil.copyfileobj(upload.file, out, UPLOAD_CHUNK_SIZE)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
 @app.post("/analyze")
 async def analyze_business_data(
     files: List[UploadFile] = File(...),
     business_description: str = Form(...)
 ):
     """Main endpoint for business data analysis."""
-    logger.info(f"📊 New analysis request with {len(files)} files")
+    logger.info("📊 New analysis request with %s files", len(files))
     
     temp_files = []
     try:
-        # Validate and save uploaded files
+        # Validate uploaded files
         for file in files:
             if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
                 raise HTTPException(
                     status_code=400, 
                     detail=f"Unsupported file type: {file.filename}"
                 )
-            
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{file.filename}") as tmp:
-                content = await file.read()
-                tmp.write(content)
-                temp_files.append(tmp.name)
-                logger.info(f"📁 Saved {file.filename} temporarily")
+        
+        # Stream all uploads to temporary files concurrently so their writes overlap
+        saved = await asyncio.gather(
+            *(asyncio.to_thread(save_upload_to_temp, file) for file in files),
+            return_exceptions=True
+        )
+        temp_files.extend(path for path in saved if isinstance(path, str))
+        for file, path in zip(files, saved):
+            if isinstance(path, BaseException):
+                raise path
+            logger.info("📁 Saved %s temporarily", file.filename)
         
         # Run workflow
-        result = run_complete_workflow(temp_files, business_description)
+        result = await run_complete_workflow_async(temp_files, business_description)
         
         if result["status"] == "success":
             data = result["data"]
@@ -111,7 +166,7 @@ async def analyze_business_data(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Analysis failed: {e}")
+        logger.error("❌ Analysis failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
     
     finally:
@@ -119,9 +174,9 @@ async def analyze_business_data(
         for temp_file in temp_files:
             try:
                 os.unlink(temp_file)
-                logger.info(f"🗑️  Cleaned up {temp_file}")
+                logger.info("🗑️  Cleaned up %s", temp_file)
             except Exception as cleanup_error:
-                logger.warning(f"⚠️  Cleanup failed for {temp_file}: {cleanup_error}")
+                logger.warning("⚠️  Cleanup failed for %s: %s", temp_file, cleanup_error)
 
 @app.get("/insights/job/{job_id}")
 async def get_insights_by_job(job_id: str):
@@ -133,7 +188,7 @@ async def get_insights_by_job(job_id: str):
         )
     
     try:
-        insight_record = db_manager.get_insights_by_job_id(job_id)
+        insight_record = await async_db_manager.get_insights_by_job_id(job_id)
         
         if not insight_record:
             raise HTTPException(status_code=404, detail="No insights found for this job")
@@ -151,7 +206,7 @@ async def get_insights_by_job(job_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Error retrieving insights for job {job_id}: {e}")
+        logger.error("❌ Error retrieving insights for job %s: %s", job_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to retrieve insights: {str(e)}")
 
 @app.get("/insights/file/{file_id}")
@@ -164,7 +219,7 @@ async def get_insights_by_file(file_id: str):
         )
     
     try:
-        insights = db_manager.get_insights_by_file_id(file_id)
+        insights = await async_db_manager.get_insights_by_file_id(file_id)
         return {
             "status": "success",
             "file_id": file_id,
@@ -172,7 +227,7 @@ async def get_insights_by_file(file_id: str):
             "total": len(insights)
         }
     except Exception as e:
-        logger.error(f"❌ Error retrieving insights for file {file_id}: {e}")
+        logger.error("❌ Error retrieving insights for file %s: %s", file_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to retrieve insights: {str(e)}")
 
 @app.get("/insights/recent")
@@ -184,17 +239,34 @@ async def get_recent_insights(limit: int = Query(50, ge=1, le=500)):
             detail="Database not configured - insights storage not available"
         )
     
+    # Open the cursor and fetch the first row before committing to a 200, so
+    # connection and query errors still get a proper error response
+    insights = async_db_manager.iter_recent_insights(limit)
     try:
-        insights = db_manager.get_recent_insights(limit)
-        return {
-            "status": "success",
-            "insights": insights,
-            "total": len(insights),
-            "limit": limit
-        }
+        first = await anext(insights, None)
     except Exception as e:
-        logger.error(f"❌ Error retrieving recent insights: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve insights: {str(e)}")
+        await insights.aclose()
+        logger.error("❌ Error retrieving recent insights: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve recent insights: {str(e)}")
+    
+    async def stream_body():
+        # Same envelope as the other listing endpoints, written incrementally;
+        # total is only known once the last row has been sent. A failure after
+        # this point aborts the response rather than closing a truncated body.
+        try:
+            yield f'{{"status": "success", "limit": {limit}, "insights": ['
+            total = 0
+            if first is not None:
+                yield first
+                total = 1
+                async for insight in insights:
+                    yield "," + insight
+                    total += 1
+            yield f'], "total": {total}}}'
+        finally:
+            await insights.aclose()
+    
+    return StreamingResponse(stream_body(), media_type="application/json")
 
 @app.put("/insights/{insight_id}/confidence")
 async def update_insight_confidence(
@@ -222,7 +294,7 @@ async def update_insight_confidence(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Error updating insight confidence: {e}")
+        logger.error("❌ Error updating insight confidence: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to update confidence: {str(e)}")
 
 @app.get("/insights/stats")
@@ -235,43 +307,10 @@ async def get_insights_stats():
         )
     
     try:
-        with db_manager.get_connection() as conn:
-            with conn.cursor() as cursor:
-                # Get total insights count
-                cursor.execute("SELECT COUNT(*) as total FROM insights")
-                total_count = cursor.fetchone()['total']
-                
-                # Get insights by type
-                cursor.execute("""
-                    SELECT insight_type, COUNT(*) as count 
-                    FROM insights 
-                    GROUP BY insight_type 
-                    ORDER BY count DESC
-                """)
-                by_type = cursor.fetchall()
-                
-                # Get average confidence score
-                cursor.execute("SELECT AVG(confidence_score) as avg_confidence FROM insights")
-                avg_confidence = cursor.fetchone()['avg_confidence']
-                
-                # Get recent activity (last 7 days)
-                cursor.execute("""
-                    SELECT COUNT(*) as recent_count 
-                    FROM insights 
-                    WHERE created_at >= NOW() - INTERVAL '7 days'
-                """)
-                recent_count = cursor.fetchone()['recent_count']
-                
-                return {
-                    "status": "success",
-                    "stats": {
-                        "total_insights": total_count,
-                        "insights_by_type": [dict(row) for row in by_type],
-                        "average_confidence": float(avg_confidence) if avg_confidence else 0.0,
-                        "recent_insights_7_days": recent_count
-                    }
-                }
-                
+        return {
+            "status": "success",
+            "stats": await async_db_manager.get_insights_stats()
+        }
     except Exception as e:
-        logger.error(f"❌ Error retrieving insights stats: {e}")
+        logger.error("❌ Error retrieving insights stats: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to retrieve stats: {str(e)}")
\ No newline at end of file
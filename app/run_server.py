@@ -1,5 +1,4 @@
 import uvicorn
-import os
 from .config import validate_environment
 from .utils import setup_logger
 
@@ -18,10 +17,12 @@ def main():
     logger.info("🚀 Starting Business Insights AI Server...")
     
     # Validate environment
-    if not validate_environment():
-        logger.error("❌ Environment validation failed")
+    env_check = validate_environment()
+    if not env_check:
+        logger.error("❌ Environment validation failed (missing: %s)", ", ".join(env_check.missing))
         logger.info("💡 Make sure to set AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT in your environment")
         return
+    logger.info("✅ Environment variables validated")
     
     # Start server
     logger.info("🌐 Starting FastAPI server...")
@@ -1,35 +1,90 @@
 import pandas as pd
 import numpy as np
+import datetime
 import os
 import json
+import hashlib
 import logging
+import shutil
 import tempfile
+import threading
+from collections import OrderedDict
 from io import BytesIO
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Iterable, Callable
+
+import orjson
+
+# pandas can hand CSV parsing to pyarrow's multithreaded reader when it is installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    pa = pa_csv = None
+    CSV_ENGINE = 'c'
+
+# File extension -> loader family
+_EXT_MAP = {'.csv': 'csv', '.xlsx': 'excel', '.xls': 'excel'}
 
 def detect_file_type(filename: str) -> str:
     """Detect file type from extension."""
-    ext = filename.lower().split('.')[-1]
-    if ext == 'csv':
-        return 'csv'
-    elif ext in ['xlsx', 'xls']:
-        return 'excel'
-    else:
-        return 'unknown'
+    return _EXT_MAP.get(os.path.splitext(filename)[1].lower(), 'unknown')
+
+# Passed to pyarrow as its only timestamp format; no value matches it, so
+# timestamp columns stay text as they do with pandas' own parser
+_NO_TIMESTAMP_FORMAT = '\x00'
+
+def _dates_to_text(df: pd.DataFrame) -> pd.DataFrame:
+    """Turn columns pyarrow parsed as dates back into text.
+
+    pyarrow only infers dates from ISO 'YYYY-MM-DD' values, so isoformat()
+    restores the original strings pandas' own parser would have kept.
+    """
+    for column in df.columns[df.dtypes == object]:
+        first = df[column].first_valid_index()
+        if first is not None and type(df[column].at[first]) is datetime.date:
+            df[column] = df[column].map(datetime.date.isoformat, na_action='ignore')
+    return df
+
+def read_csv(source: Any, **kwargs) -> pd.DataFrame:
+    """Read a CSV with the fastest available engine, falling back to pandas' own parser.
+
+    pyarrow's type inference is held to what pandas' parser infers, so the
+    dtypes seen by profiling and prompts don't depend on which engine ran.
+    """
+    if CSV_ENGINE == 'pyarrow' and not callable(kwargs.get('usecols')):
+        try:
+            return _dates_to_text(pd.read_csv(source, engine='pyarrow', date_format=_NO_TIMESTAMP_FORMAT, **kwargs))
+        except Exception:
+            # pyarrow rejects some dialects pandas tolerates; rewind and retry
+            if hasattr(source, 'seek'):
+                source.seek(0)
+    return pd.read_csv(source, **kwargs)
+
+def _shared_buffer(file_data: Union[bytes, bytearray, memoryview]) -> BytesIO:
+    """Wrap payload bytes in a reader without duplicating them.
+
+    CPython's BytesIO shares the storage of an exact ``bytes`` object until it
+    is written to, whereas any other buffer type is copied up front, so only
+    non-bytes payloads are materialised here.
+    """
+    return BytesIO(file_data if type(file_data) is bytes else bytes(file_data))
 
 def load_dataframe_from_bytes(file_data: bytes, filename: str) -> pd.DataFrame:
-    """Load DataFrame from bytea data."""
+    """Load DataFrame from bytea data.
+
+    The payload is read in place, so callers must not mutate it until this returns.
+    """
     try:
         if not file_data:
             raise ValueError("File data is empty")
             
         file_type = detect_file_type(filename)
-        buffer = BytesIO(file_data)
         
         if file_type == 'csv':
-            return pd.read_csv(buffer)
+            return read_csv(_shared_buffer(file_data))
         elif file_type == 'excel':
-            return pd.read_excel(buffer)
+            return pd.read_excel(_shared_buffer(file_data))
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
     except Exception as e:
@@ -52,36 +107,49 @@ def load_dataframe_from_file_object(file_obj: Dict[str, Any]) -> pd.DataFrame:
     except Exception as e:
         raise Exception(f"Failed to load file object: {str(e)}")
 
-def load_dataframe(file_path: str) -> pd.DataFrame:
-    """Safely load DataFrame from various file formats."""
+def load_dataframe(file_path: str, dtype: Optional[Dict[str, str]] = None, usecols: Any = None) -> pd.DataFrame:
+    """Safely load DataFrame from various file formats.
+
+    dtype and usecols are passed through to pandas; a known dtype map lets the
+    CSV parser skip type inference for those columns.
+    """
     try:
         file_type = detect_file_type(file_path)
         if file_type == 'csv':
-            return pd.read_csv(file_path)
+            return read_csv(file_path, dtype=dtype, usecols=usecols)
         elif file_type == 'excel':
-            return pd.read_excel(file_path)
+            return pd.read_excel(file_path, dtype=dtype, usecols=usecols)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
     except Exception as e:
         raise Exception(f"Failed to load {file_path}: {str(e)}")
 
-def create_temp_file_from_bytes(file_data: bytes, filename: str) -> str:
-    """Create a temporary file from bytea data and return the path."""
+def create_temp_file_from_bytes(file_data: bytes, filename: str, temp_dir: Optional[str] = None) -> str:
+    """Create a temporary file from bytea data (inside temp_dir if given) and return the path."""
     try:
         # Get file extension
         _, ext = os.path.splitext(filename)
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp_file:
-            tmp_file.write(file_data)
-            temp_path = tmp_file.name
+        # Write straight to the raw descriptor; no buffered-writer copy of the payload
+        fd, temp_path = tempfile.mkstemp(suffix=ext, dir=temp_dir)
+        try:
+            view = memoryview(file_data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        finally:
+            os.close(fd)
             
         return temp_path
     except Exception as e:
         raise Exception(f"Failed to create temp file from bytes: {str(e)}")
 
-def file_objects_to_temp_paths(file_objects: List[Dict[str, Any]]) -> List[str]:
-    """Convert file objects to temporary file paths for backward compatibility."""
+def file_objects_to_temp_paths(file_objects: Iterable[Dict[str, Any]], temp_dir: Optional[str] = None) -> List[str]:
+    """Convert file objects (a list or a streaming iterator) to temporary file paths.
+
+    Pass a directory from create_temp_dir() to have every materialised file land in it,
+    so the whole batch can be removed with a single cleanup_temp_dir() call.
+    """
     temp_paths = []
     
     for file_obj in file_objects:
@@ -89,7 +157,7 @@ def file_objects_to_temp_paths(file_objects: List[Dict[str, Any]]) -> List[str]:
             # If bytea data is available, create temp file
             if file_obj.get('file_data'):
                 filename = file_obj.get('original_name', file_obj.get('filename', 'unknown.csv'))
-                temp_path = create_temp_file_from_bytes(file_obj['file_data'], filename)
+                temp_path = create_temp_file_from_bytes(file_obj['file_data'], filename, temp_dir)
                 temp_paths.append(temp_path)
             # Fallback to existing file path
             elif file_obj.get('file_path'):
@@ -99,63 +167,267 @@ def file_objects_to_temp_paths(file_objects: List[Dict[str, Any]]) -> List[str]:
                 
         except Exception as e:
             # Log error but continue with other files
-            logger = setup_logger(__name__)
-            logger.error(f"❌ Failed to process file object: {e}")
+            logger.error("❌ Failed to process file object: %s", e)
             continue
     
     return temp_paths
 
 def cleanup_temp_files(file_paths: List[str]) -> None:
-    """Clean up temporary files created from bytea data."""
-    logger = setup_logger(__name__)
-    
+    """Clean up temporary files created from bytea data.
+
+    Deprecated: materialise files into a create_temp_dir() directory and remove
+    it with cleanup_temp_dir() instead of unlinking paths one by one.
+    """
     for file_path in file_paths:
         try:
             # Only delete files in temp directory to be safe
             if '/tmp/' in file_path or 'temp' in file_path.lower():
                 if os.path.exists(file_path):
                     os.unlink(file_path)
-                    logger.debug(f"🗑️ Cleaned up temp file: {file_path}")
+                    logger.debug("🗑️ Cleaned up temp file: %s", file_path)
         except Exception as e:
-            logger.warning(f"⚠️ Failed to clean up temp file {file_path}: {e}")
+            logger.warning("⚠️ Failed to clean up temp file %s: %s", file_path, e)
+
+def create_temp_dir() -> str:
+    """Create a private directory to hold one workflow's temporary files."""
+    return tempfile.mkdtemp(prefix="insights_")
+
+def cleanup_temp_dir(temp_dir: str) -> None:
+    """Remove a workflow temp directory and everything in it in one pass."""
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    logger.debug("🗑️ Cleaned up temp dir: %s", temp_dir)
 
-def safe_json_parse(text: str, fallback: Dict = None) -> Dict:
-    """Parse JSON with fallback handling."""
+def _loads_json(text: Union[str, bytes]) -> Any:
+    """Decode with orjson, retrying with the stdlib parser for the NaN/Infinity literals orjson rejects."""
     try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
         return json.loads(text)
-    except (json.JSONDecodeError, TypeError):
+
+def safe_json_parse(text: Union[str, bytes], fallback: Dict = None) -> Dict:
+    """Parse JSON (str or UTF-8 bytes) with fallback handling, recovering objects wrapped in surrounding text."""
+    if not isinstance(text, (str, bytes, bytearray)):
+        return fallback or {}
+    
+    # Slice to the outermost {...} first so replies wrapped in prose or markdown
+    # fences parse on the first attempt instead of after a raised decode error
+    brace_open, brace_close = ('{', '}') if isinstance(text, str) else (b'{', b'}')
+    start = text.find(brace_open)
+    end = text.rfind(brace_close)
+    if 0 <= start < end:
+        try:
+            return _loads_json(text[start:end + 1])
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            pass
+    
+    # Not a lone object (e.g. a top-level array); try the reply as-is
+    try:
+        return _loads_json(text)
+    except (json.JSONDecodeError, UnicodeDecodeError):
         return fallback or {}
 
+# Profiled dtypes that pandas can apply directly on read (datetimes need parse_dates instead)
+_READ_HINT_DTYPES = frozenset({'int64', 'float64', 'bool', 'object'})
+
+def dtype_hints(data_types: Dict[Any, str]) -> Dict[Any, str]:
+    """Keep the profiled column dtypes that are safe to hand back to the reader."""
+    return {column: dtype for column, dtype in data_types.items() if dtype in _READ_HINT_DTYPES}
+
+def split_column_kinds(dtypes: Dict[Any, Any]) -> tuple:
+    """Split columns into (numeric, categorical) in one pass, matching select_dtypes('number'/'object')."""
+    numeric_columns, categorical_columns = [], []
+    for column, dtype in dtypes.items():
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            numeric_columns.append(column)
+        elif dtype == object:
+            categorical_columns.append(column)
+    return numeric_columns, categorical_columns
+
 def format_dataframe_summary(df: pd.DataFrame) -> Dict[str, Any]:
     """Create comprehensive metadata summary of DataFrame."""
     try:
+        dtypes = dict(zip(df.columns, df.dtypes))
+        numeric_columns, categorical_columns = split_column_kinds(dtypes)
         return {
             "filename": "unknown",  # Will be set by caller
             "columns": list(df.columns),
             "shape": df.shape,
             "sample_rows": df.head(3).to_dict('records'),
-            "data_types": df.dtypes.astype(str).to_dict(),
-            "null_counts": df.isnull().sum().to_dict(),
-            "numeric_columns": df.select_dtypes(include=['number']).columns.tolist(),
-            "categorical_columns": df.select_dtypes(include=['object']).columns.tolist()
+            "data_types": {column: str(dtype) for column, dtype in dtypes.items()},
+            # count() tallies non-null cells in C without materialising a boolean mask
+            "null_counts": {column: len(df) - int(non_null) for column, non_null in zip(df.columns, df.count())},
+            "numeric_columns": numeric_columns,
+            "categorical_columns": categorical_columns
         }
     except Exception as e:
         return {"error": f"Failed to analyze DataFrame: {str(e)}"}
 
+# CSVs above this size are profiled chunk by chunk instead of loaded whole
+METADATA_STREAM_THRESHOLD_BYTES = 16 * 1024 * 1024
+METADATA_STREAM_CHUNK_ROWS = 100_000
+
+def _merge_dtype(current: np.dtype, new: np.dtype) -> np.dtype:
+    """Widen a column dtype seen in an earlier chunk to also cover a later one."""
+    if current == new:
+        return current
+    # Text anywhere makes the parser read the whole column as text (pandas' str dtype, if in use)
+    for dtype in (current, new):
+        if not isinstance(dtype, np.dtype) and pd.api.types.is_string_dtype(dtype):
+            return dtype
+    try:
+        return np.promote_types(current, new)
+    except TypeError:
+        return np.dtype(object)
+
+def summarize_csv_streaming(file_path: str) -> Dict[str, Any]:
+    """Profile a large CSV with bounded memory, producing the same shape as format_dataframe_summary."""
+    try:
+        row_count = 0
+        columns: List[Any] = []
+        sample_rows: List[Dict[str, Any]] = []
+        dtypes: Dict[Any, np.dtype] = {}
+        null_counts: Dict[Any, int] = {}
+        
+        for chunk in pd.read_csv(file_path, chunksize=METADATA_STREAM_CHUNK_ROWS, low_memory=False):
+            if not columns:
+                columns = list(chunk.columns)
+                sample_rows = chunk.head(3).to_dict('records')
+                dtypes = dict(chunk.dtypes)
+                null_counts = dict.fromkeys(columns, 0)
+            else:
+                for column, dtype in chunk.dtypes.items():
+                    dtypes[column] = _merge_dtype(dtypes[column], dtype)
+            for column, count in chunk.isna().sum().items():
+                null_counts[column] += int(count)
+            row_count += len(chunk)
+        
+        numeric_columns, categorical_columns = split_column_kinds(dtypes)
+        return {
+            "filename": "unknown",  # Will be set by caller
+            "columns": columns,
+            "shape": (row_count, len(columns)),
+            "sample_rows": sample_rows,
+            "data_types": {column: str(dtype) for column, dtype in dtypes.items()},
+            "null_counts": null_counts,
+            "numeric_columns": numeric_columns,
+            "categorical_columns": categorical_columns
+        }
+    except Exception as e:
+        return {"error": f"Failed to analyze DataFrame: {str(e)}"}
+
+def summarize_csv_arrow(file_path: str) -> Dict[str, Any]:
+    """Profile a large CSV from Arrow record batches, reading null counts from batch metadata.
+
+    Raises if Arrow cannot parse the file (e.g. a column changes type after the
+    first block), so callers can fall back to the pandas profiler.
+    """
+    # Infer types the way pandas' parser does: timestamps and dates stay text
+    convert_options = pa_csv.ConvertOptions(strings_can_be_null=True, timestamp_parsers=[_NO_TIMESTAMP_FORMAT])
+    reader = pa_csv.open_csv(file_path, convert_options=convert_options)
+    date_columns = [field.name for field in reader.schema if pa.types.is_date(field.type)]
+    if date_columns:
+        # Only the first block has been read; reopen with those columns typed as text
+        reader.close()
+        convert_options.column_types = dict.fromkeys(date_columns, pa.string())
+        reader = pa_csv.open_csv(file_path, convert_options=convert_options)
+    schema = reader.schema
+    columns = schema.names
+    null_counts = dict.fromkeys(columns, 0)
+    sample_rows: List[Dict[str, Any]] = []
+    row_count = 0
+    
+    for batch in reader:
+        if not sample_rows and batch.num_rows:
+            sample_rows = batch.slice(0, 3).to_pylist()
+        for column, array in zip(columns, batch.columns):
+            null_counts[column] += array.null_count
+        row_count += batch.num_rows
+    
+    # Resolve pandas dtypes from the schema alone via an empty table, then apply
+    # what pandas does to columns with nulls: ints widen to float, bools to object
+    dtypes = dict(schema.empty_table().to_pandas().dtypes)
+    for field in schema:
+        if pa.types.is_null(field.type) or (pa.types.is_integer(field.type) and null_counts[field.name]):
+            dtypes[field.name] = np.dtype('float64')
+        elif pa.types.is_boolean(field.type) and null_counts[field.name]:
+            dtypes[field.name] = np.dtype(object)
+    numeric_columns, categorical_columns = split_column_kinds(dtypes)
+    return {
+        "filename": "unknown",  # Will be set by caller
+        "columns": columns,
+        "shape": (row_count, len(columns)),
+        "sample_rows": sample_rows,
+        "data_types": {column: str(dtype) for column, dtype in dtypes.items()},
+        "null_counts": null_counts,
+        "numeric_columns": numeric_columns,
+        "categorical_columns": categorical_columns
+    }
+
+def summarize_file(file_path: str) -> Dict[str, Any]:
+    """Profile a file, streaming large CSVs rather than materialising them."""
+    if detect_file_type(file_path) == 'csv' and os.path.getsize(file_path) > METADATA_STREAM_THRESHOLD_BYTES:
+        if pa_csv is not None:
+            try:
+                return summarize_csv_arrow(file_path)
+            except Exception as e:
+                logger.debug("Arrow profiling failed for %s, using pandas chunks: %s", file_path, e)
+        return summarize_csv_streaming(file_path)
+    return format_dataframe_summary(load_dataframe(file_path))
+
+# Profiled file summaries keyed by content, reused across workflow runs
+METADATA_CACHE_MAX_ENTRIES = 512
+_metadata_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_metadata_cache_lock = threading.Lock()
+
+def file_content_key(file_path: str) -> tuple:
+    """Identify file contents by type, size and blake2b digest (independent of path and mtime)."""
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return (detect_file_type(file_path), os.path.getsize(file_path), hasher.hexdigest())
+
+def get_file_metadata(file_path: str, summarize: Callable[[str], Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Profile a file, reusing the summary of identical contents seen before.
+
+    summarize produces the summary on a cache miss (defaults to summarize_file
+    in this process), letting callers move the parse elsewhere.
+    """
+    key = file_content_key(file_path)
+    with _metadata_cache_lock:
+        summary = _metadata_cache.get(key)
+        if summary is not None:
+            _metadata_cache.move_to_end(key)
+    
+    if summary is None:
+        summary = (summarize or summarize_file)(file_path)
+        if "error" not in summary:
+            with _metadata_cache_lock:
+                _metadata_cache[key] = summary
+                while len(_metadata_cache) > METADATA_CACHE_MAX_ENTRIES:
+                    _metadata_cache.popitem(last=False)
+    
+    metadata = dict(summary)
+    metadata["filename"] = os.path.basename(file_path)
+    return metadata
+
+# Level for app loggers; DEBUG output is opt-in so hot-path debug calls cost a level check
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+_LOG_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
 def setup_logger(name: str) -> logging.Logger:
     """Setup logger with proper formatting."""
     logger = logging.getLogger(name)
     if not logger.handlers:
         handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        handler.setLevel(logging.DEBUG)
+        handler.setFormatter(_LOG_FORMATTER)
         logger.addHandler(handler)
-        logger.setLevel(logging.DEBUG)
+        logger.setLevel(LOG_LEVEL)
     return logger
 
+logger = setup_logger(__name__)
+
 def convert_numpy_types(obj: Any) -> Any:
     """
     Convert NumPy types to native Python types for JSON serialization.
@@ -188,10 +460,22 @@ def convert_numpy_types(obj: Any) -> Any:
     else:
         return obj
 
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _orjson_default(obj: Any) -> Any:
+    """Fallback for values orjson cannot encode natively (e.g. pandas NA)."""
+    converted = convert_numpy_types(obj)
+    if converted is obj:
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+    return converted
+
 def safe_json_dumps(obj: Any, **kwargs) -> str:
     """
     Safely serialize an object to JSON, converting NumPy types first.
     
+    Uses orjson (which encodes NumPy values natively) unless json.dumps
+    formatting arguments are given.
+    
     Args:
         obj: The object to serialize
         **kwargs: Additional arguments to pass to json.dumps
@@ -199,5 +483,10 @@ def safe_json_dumps(obj: Any, **kwargs) -> str:
     Returns:
         JSON string representation of the object
     """
+    if not kwargs:
+        try:
+            return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTIONS).decode("utf-8")
+        except TypeError:
+            pass
     converted_obj = convert_numpy_types(obj)
     return json.dumps(converted_obj, **kwargs)
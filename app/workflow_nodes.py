@@ -1,98 +1,137 @@
 import os
-from typing import Dict, Any
-import pandas as pd
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Tuple
+import httpx
 from langchain_openai import AzureChatOpenAI
 from langsmith import traceable
-import json
 from datetime import datetime
 
-from .workflow_types import InsightState
-from .utils import load_dataframe, format_dataframe_summary, setup_logger, safe_json_parse
+from .workflow_types import InsightState, HelpSuggestion, DEFAULT_SUGGESTION
+from .llm_cache import cached_ainvoke
+from .utils import get_file_metadata, setup_logger, safe_json_parse, dtype_hints
 from .config import (
-    AZURE_OPENAI_API_KEY, 
-    AZURE_OPENAI_ENDPOINT, 
+    get_env,
     AZURE_OPENAI_API_VERSION,
     AZURE_DEPLOYMENT_NAME,
-    LLM_TEMPERATURE
+    LLM_TEMPERATURE,
+    LLM_MAX_CONCURRENCY,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP_MAX_KEEPALIVE,
+    FILE_LOAD_MAX_WORKERS
 )
 
 # Setup logger
 logger = setup_logger(__name__)
 
-# Initialize Azure OpenAI LLM
-try:
-    llm = AzureChatOpenAI(
-        deployment_name=AZURE_DEPLOYMENT_NAME,
-        openai_api_version=AZURE_OPENAI_API_VERSION,
-        azure_endpoint=AZURE_OPENAI_ENDPOINT,
-        openai_api_key=AZURE_OPENAI_API_KEY,
-        temperature=LLM_TEMPERATURE
-    )
-    logger.info("✅ Azure OpenAI LLM initialized successfully")
-except Exception as e:
-    logger.warning(f"⚠️  Azure OpenAI initialization failed: {e}")
-    # Create a placeholder that will fail gracefully if used
-    llm = None
+# One LLM client per event loop: httpx.AsyncClient ties its pooled connections
+# to the loop that opened them, and sync callers run each job on a fresh loop
+_llm_by_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_llm_lock = threading.Lock()
+
+def _create_llm():
+    """Create an Azure OpenAI LLM with its own pooled HTTP client, or None if unavailable."""
+    try:
+        env = get_env()
+        # One pooled transport for every LLM call on a loop so TLS handshakes are paid once per socket
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE
+            )
+        )
+        llm = AzureChatOpenAI(
+            deployment_name=AZURE_DEPLOYMENT_NAME,
+            openai_api_version=AZURE_OPENAI_API_VERSION,
+            azure_endpoint=env.azure_openai_endpoint,
+            openai_api_key=env.azure_openai_api_key,
+            temperature=LLM_TEMPERATURE,
+            http_async_client=http_client
+        )
+        logger.info("✅ Azure OpenAI LLM initialized successfully")
+        return llm
+    except Exception as e:
+        logger.warning("⚠️  Azure OpenAI initialization failed: %s", e)
+        return None
+
+def get_llm():
+    """Return the LLM for the running event loop, creating it on first use (None if unavailable)."""
+    loop = asyncio.get_running_loop()
+    with _llm_lock:
+        if loop not in _llm_by_loop:
+            _llm_by_loop[loop] = _create_llm()
+        return _llm_by_loop[loop]
 
-def analyze_data_node(state: InsightState) -> InsightState:
+async def close_llm_client() -> None:
+    """Close the running loop's LLM HTTP client and its pooled connections."""
+    with _llm_lock:
+        llm = _llm_by_loop.pop(asyncio.get_running_loop(), None)
+    if llm is not None:
+        await llm.http_async_client.aclose()
+
+def _analyze_file(file_path: str, summarize=None) -> Tuple[str, Dict[str, Any]]:
+    """Profile one file, returning an error entry instead of raising."""
+    try:
+        # Generate metadata (reused when the same file contents were profiled before)
+        file_metadata = get_file_metadata(file_path, summarize)
+        logger.info("✅ Processed %s: %s", file_metadata['filename'], file_metadata.get('shape'))
+        return file_path, file_metadata
+    except Exception as e:
+        logger.error("❌ Error processing %s: %s", file_path, e)
+        return file_path, {"error": str(e)}
+
+def analyze_data_node(state: InsightState) -> Dict[str, Any]:
     """Extract metadata and samples from uploaded files."""
     logger.info("🔍 Analyzing uploaded files...")
     
-    metadata = {}
-    for file_path in state["files"]:
-        try:
-            # Load the dataframe
-            df = load_dataframe(file_path)
-            
-            # Generate metadata
-            file_metadata = format_dataframe_summary(df)
-            file_metadata["filename"] = os.path.basename(file_path)
-            
-            metadata[file_path] = file_metadata
-            logger.info(f"✅ Processed {file_metadata['filename']}: {df.shape}")
-            
-        except Exception as e:
-            logger.error(f"❌ Error processing {file_path}: {e}")
-            metadata[file_path] = {"error": str(e)}
+    files = state["files"]
+    if len(files) > 1:
+        from .analysis_engine import summarize_file_in_pool
+        
+        # Threads hash files and check the metadata cache; cache misses are
+        # parsed in the shared worker processes so they run on separate cores
+        analyze = partial(_analyze_file, summarize=summarize_file_in_pool)
+        with ThreadPoolExecutor(max_workers=min(FILE_LOAD_MAX_WORKERS, len(files))) as executor:
+            metadata = dict(executor.map(analyze, files))
+    else:
+        metadata = dict(map(_analyze_file, files))
     
     return {
-        **state, 
         "file_metadata": metadata, 
         "current_step": "analyze_data_complete"
     }
 
 def create_data_summary(file_metadata: Dict[str, Any]) -> str:
     """Create concise data summary for LLM."""
-    summary = ""
-    for file_path, metadata in file_metadata.items():
-        if "error" not in metadata:
-            summary += f"File: {metadata['filename']}\n"
-            summary += f"- {metadata['shape'][0]} rows, {metadata['shape'][1]} columns\n"
-            summary += f"- Columns: {', '.join(metadata['columns'][:5])}\n\n"
-    return summary
+    return "".join(
+        f"File: {metadata['filename']}\n"
+        f"- {metadata['shape'][0]} rows, {metadata['shape'][1]} columns\n"
+        f"- Columns: {', '.join(metadata['columns'][:5])}\n\n"
+        for metadata in file_metadata.values()
+        if "error" not in metadata
+    )
+
+# Confidence boost for each analysis component present in the results
+_ANALYSIS_BOOSTS = (
+    ("metrics", 0.15),          # Has meaningful metrics
+    ("key_findings", 0.1),      # Has findings
+    ("visualizations", 0.1),    # Has visualizations
+    ("recommendations", 0.1),   # Has recommendations
+)
 
 def calculate_insight_confidence(analysis_results: Dict[str, Any], business_insights: Dict[str, Any]) -> float:
     """Calculate confidence score based on analysis and insight quality."""
-    confidence = 0.5  # Base confidence
-    
-    # Boost confidence based on analysis quality
-    if analysis_results.get("metrics") and len(analysis_results["metrics"]) > 0:
-        confidence += 0.15  # Has meaningful metrics
-    
-    if analysis_results.get("key_findings") and len(analysis_results["key_findings"]) > 0:
-        confidence += 0.1   # Has findings
-    
-    if analysis_results.get("visualizations") and len(analysis_results["visualizations"]) > 0:
-        confidence += 0.1   # Has visualizations
-    
-    if analysis_results.get("recommendations") and len(analysis_results["recommendations"]) > 0:
-        confidence += 0.1   # Has recommendations
+    # Base confidence, boosted by each non-empty analysis component
+    confidence = sum((boost for key, boost in _ANALYSIS_BOOSTS if analysis_results.get(key)), 0.5)
     
     # Boost confidence based on business insight quality
-    if business_insights.get("executive_summary") and len(business_insights["executive_summary"]) > 50:
+    if len(business_insights.get("executive_summary") or "") > 50:
         confidence += 0.05  # Has substantial summary
     
-    if business_insights.get("next_steps") and len(business_insights["next_steps"]) > 0:
+    if business_insights.get("next_steps"):
         confidence += 0.05  # Has actionable next steps
     
     # Penalize for errors
@@ -100,19 +139,19 @@ def calculate_insight_confidence(analysis_results: Dict[str, Any], business_insi
         confidence -= 0.3   # Significant penalty for errors
     
     # Ensure confidence is between 0.1 and 0.95
-    return max(0.1, min(0.95, confidence))
+    return 0.1 if confidence < 0.1 else 0.95 if confidence > 0.95 else confidence
 
 @traceable
-def understand_business_node(state: InsightState) -> InsightState:
+async def understand_business_node(state: InsightState) -> Dict[str, Any]:
     """Understand business and generate help suggestions."""
     logger.info("🧠 Understanding business context...")
     
+    llm = get_llm()
     if llm is None:
         logger.error("❌ LLM not initialized - cannot understand business context")
         return {
-            **state,
             "business_understanding": "LLM not available",
-            "help_suggestions": [{"title": "General Analysis", "description": "Basic data insights", "priority": "medium"}],
+            "help_suggestions": [DEFAULT_SUGGESTION],
             "current_step": "business_understanding_error"
         }
     
@@ -136,128 +175,217 @@ Provide JSON response:
 
 Generate exactly 3 help suggestions."""
 
-        response = llm.invoke(prompt)
-        result = safe_json_parse(response.content, {
+        content = await cached_ainvoke(llm, prompt)
+        result = safe_json_parse(content, {
             "business_understanding": "Analysis in progress...",
             "help_suggestions": [{"title": "General Analysis", "description": "Basic data insights", "priority": "medium"}]
         })
         
-        logger.info(f"✅ Generated {len(result['help_suggestions'])} suggestions")
+        suggestions = [HelpSuggestion.from_dict(item) for item in result["help_suggestions"] if isinstance(item, dict)]
+        logger.info("✅ Generated %s suggestions", len(suggestions))
         
         return {
-            **state,
             "business_understanding": result["business_understanding"],
-            "help_suggestions": result["help_suggestions"],
+            "help_suggestions": suggestions or [DEFAULT_SUGGESTION],
             "current_step": "business_understanding_complete"
         }
         
     except Exception as e:
-        logger.error(f"❌ Business understanding error: {e}")
+        logger.error("❌ Business understanding error: %s", e)
         return {
-            **state, 
             "current_step": "business_understanding_error"
         }
 
-@traceable
-def map_files_to_insights_node(state: InsightState) -> InsightState:
-    """Map files to insights."""
-    logger.info("🔗 Mapping files to insights...")
-    
-    mappings = {}
-    
+async def _map_suggestion_files(
+    suggestion: HelpSuggestion,
+    file_descriptions: str,
+    fname_to_path: Dict[str, str],
+    state: InsightState
+) -> Dict[str, Any]:
+    """Ask the LLM which files serve one suggestion, falling back to the first file on error."""
+    prompt = f"""Which files are most relevant for this insight?
+
+INSIGHT: {suggestion.title} - {suggestion.description}
+
+AVAILABLE FILES:
+{file_descriptions}
+
+Return JSON: {{"relevant_files": ["filename1.csv"], "confidence": "high", "reasoning": "why these files"}}"""
+
     try:
-        # Create file descriptions for LLM
-        file_descriptions = ""
-        for file_path, metadata in state["file_metadata"].items():
-            if "error" not in metadata:
-                file_descriptions += f"{metadata['filename']}: {', '.join(metadata['columns'])}\n"
+        content = await cached_ainvoke(get_llm(), prompt)
+        result = safe_json_parse(content, {
+            "relevant_files": [list(state["file_metadata"].keys())[0]] if state["file_metadata"] else [],
+            "confidence": "medium",
+            "reasoning": "fallback mapping"
+        })
+        
+        # Map back to full file paths
+        relevant_files = [fname_to_path[fn] for fn in result["relevant_files"] if fn in fname_to_path]
         
-        for suggestion in state["help_suggestions"]:
-            prompt = f"""Which files are most relevant for this insight?
+        return {
+            "relevant_files": relevant_files,
+            "confidence": result.get("confidence", "medium"),
+            "reasoning": result.get("reasoning", "")
+        }
+        
+    except Exception as e:
+        logger.error("❌ Error mapping files for %s: %s", suggestion.title, e)
+        # Fallback: use first available file
+        return {
+            "relevant_files": list(state["files"])[:1],
+            "confidence": "low",
+            "reasoning": "fallback due to error"
+        }
 
-INSIGHT: {suggestion['title']} - {suggestion['description']}
+async def _map_all_suggestion_files(
+    suggestions: List[HelpSuggestion],
+    file_descriptions: str,
+    fname_to_path: Dict[str, str]
+) -> Dict[str, Dict[str, Any]]:
+    """Map every suggestion to files with one LLM call; titles missing from the reply are left out."""
+    insight_lines = "".join(f"- {suggestion.title}: {suggestion.description}\n" for suggestion in suggestions)
+    prompt = f"""Which files are most relevant for each of these insights?
 
+INSIGHTS:
+{insight_lines}
 AVAILABLE FILES:
 {file_descriptions}
 
-Return JSON: {{"relevant_files": ["filename1.csv"], "confidence": "high", "reasoning": "why these files"}}"""
+Return JSON keyed by the exact insight title: {{"mappings": {{"Revenue Analysis": {{"relevant_files": ["filename1.csv"], "confidence": "high", "reasoning": "why these files"}}}}}}"""
 
-            try:
-                response = llm.invoke(prompt)
-                result = safe_json_parse(response.content, {
-                    "relevant_files": [list(state["file_metadata"].keys())[0]] if state["file_metadata"] else [],
-                    "confidence": "medium",
-                    "reasoning": "fallback mapping"
-                })
-                
-                # Map back to full file paths
-                relevant_files = []
-                for filename in result["relevant_files"]:
-                    for file_path, metadata in state["file_metadata"].items():
-                        if metadata.get("filename") == filename:
-                            relevant_files.append(file_path)
-                            break
-                
-                mappings[suggestion['title']] = {
-                    "relevant_files": relevant_files,
-                    "confidence": result.get("confidence", "medium"),
-                    "reasoning": result.get("reasoning", "")
-                }
-                
-            except Exception as e:
-                logger.error(f"❌ Error mapping files for {suggestion['title']}: {e}")
-                # Fallback: use first available file
-                mappings[suggestion['title']] = {
-                    "relevant_files": list(state["files"])[:1],
-                    "confidence": "low",
-                    "reasoning": "fallback due to error"
-                }
+    try:
+        content = await cached_ainvoke(get_llm(), prompt)
+        result = safe_json_parse(content).get("mappings")
+    except Exception as e:
+        logger.error("❌ Batched file mapping failed: %s", e)
+        return {}
+    
+    mappings = {}
+    if not isinstance(result, dict):
+        return mappings
+    for suggestion in suggestions:
+        entry = result.get(suggestion.title)
+        if isinstance(entry, dict) and isinstance(entry.get("relevant_files"), list):
+            mappings[suggestion.title] = {
+                "relevant_files": [fname_to_path[fn] for fn in entry["relevant_files"] if fn in fname_to_path],
+                "confidence": entry.get("confidence", "medium"),
+                "reasoning": entry.get("reasoning", "")
+            }
+    return mappings
+
+@traceable
+async def map_files_to_insights_node(state: InsightState) -> Dict[str, Any]:
+    """Map files to insights."""
+    logger.info("🔗 Mapping files to insights...")
+    
+    try:
+        # Create file descriptions for LLM, and a filename -> path index to resolve its answers
+        description_lines = []
+        fname_to_path = {}
+        for file_path, metadata in state["file_metadata"].items():
+            if "error" not in metadata:
+                description_lines.append(f"{metadata['filename']}: {', '.join(metadata['columns'])}\n")
+                fname_to_path.setdefault(metadata['filename'], file_path)
+        file_descriptions = "".join(description_lines)
+        
+        # One request maps every suggestion at once
+        suggestions = state["help_suggestions"]
+        batched = await _map_all_suggestion_files(suggestions, file_descriptions, fname_to_path) if suggestions else {}
         
-        logger.info(f"✅ Mapped files for {len(mappings)} insights")
+        # Suggestions the batched reply missed get their own requests, all in flight at once
+        missing = [suggestion for suggestion in suggestions if suggestion.title not in batched]
+        if missing:
+            logger.warning("⚠️  Batched mapping missed %d insight(s), mapping them individually", len(missing))
+        semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        
+        async def _map(suggestion: HelpSuggestion) -> Dict[str, Any]:
+            async with semaphore:
+                return await _map_suggestion_files(suggestion, file_descriptions, fname_to_path, state)
+        
+        results = await asyncio.gather(*(_map(suggestion) for suggestion in missing))
+        batched.update(zip((suggestion.title for suggestion in missing), results))
+        mappings = {suggestion.title: batched[suggestion.title] for suggestion in suggestions}
+        
+        logger.info("✅ Mapped files for %s insights", len(mappings))
         return {
-            **state, 
             "file_mappings": mappings, 
             "current_step": "file_mapping_complete"
         }
         
     except Exception as e:
-        logger.error(f"❌ File mapping failed: {e}")
-        return {**state, "current_step": "file_mapping_error"}
+        logger.error("❌ File mapping failed: %s", e)
+        return {"current_step": "file_mapping_error"}
 
 @traceable
-def generate_insights_node(state: InsightState) -> InsightState:
+async def generate_insights_node(state: InsightState) -> Dict[str, Any]:
     """Generate actual insights using code generation and execution."""
     logger.info("⚡ Generating insights with real analysis...")
     
-    from .analysis_engine import get_data_structure_info, generate_analysis_code, execute_analysis_code, generate_insight_summary
+    from .analysis_engine import (
+        get_data_structure_info,
+        get_schema_signature,
+        generate_analysis_code_batch,
+        execute_analysis_code_batch,
+        update_code_cache,
+        generate_insight_summary_batch
+    )
     
     final_insights = []
+    llm = get_llm()
     
     try:
-        for suggestion in state["help_suggestions"]:
-            logger.info(f"🔍 Processing: {suggestion['title']}")
+        suggestions = state["help_suggestions"]
+        files_per_suggestion = []
+        data_infos = []
+        schema_signatures = []
+        # Suggestions often map to the same files; describe each file set once
+        described_file_sets = {}
+        
+        for suggestion in suggestions:
+            logger.info("🔍 Processing: %s", suggestion.title)
             
-            title = suggestion['title']
+            title = suggestion.title
             relevant_files = state["file_mappings"].get(title, {}).get("relevant_files", [])
             
             if not relevant_files:
-                logger.warning(f"⚠️  No files mapped for {title}, using all files")
+                logger.warning("⚠️  No files mapped for %s, using all files", title)
                 relevant_files = state["files"]
             
-            # Get data structure info for LLM
-            data_info = get_data_structure_info(relevant_files, state["file_metadata"])
-            
-            # Generate analysis code
-            logger.info(f"🔧 Generating analysis code for {title}")
-            analysis_code = generate_analysis_code(suggestion, data_info, llm)
-            
-            # Execute the generated code
-            logger.info(f"⚙️  Executing analysis for {title}")
-            analysis_results = execute_analysis_code(analysis_code, relevant_files)
-            
-            # Generate business-friendly summary
-            logger.info(f"📋 Creating business summary for {title}")
-            business_insights = generate_insight_summary(suggestion, analysis_results, llm)
+            files_per_suggestion.append(relevant_files)
+            file_set = tuple(relevant_files)
+            if file_set not in described_file_sets:
+                # Get data structure info for LLM
+                described_file_sets[file_set] = (
+                    get_data_structure_info(relevant_files, state["file_metadata"]),
+                    get_schema_signature(relevant_files, state["file_metadata"])
+                )
+            data_info, schema_signature = described_file_sets[file_set]
+            data_infos.append(data_info)
+            schema_signatures.append(schema_signature)
+        
+        # Generate analysis code for all insights concurrently
+        logger.info("🔧 Generating analysis code for %d insights", len(suggestions))
+        analysis_codes = await generate_analysis_code_batch(suggestions, data_infos, llm, schema_signatures)
+        
+        # Execute the generated code in parallel worker processes
+        logger.info("⚙️  Executing analysis for %d insights", len(suggestions))
+        read_hints = {
+            file_path: dtype_hints(metadata.get("data_types", {}))
+            for file_path, metadata in state["file_metadata"].items()
+            if "error" not in metadata
+        }
+        all_analysis_results = await execute_analysis_code_batch(analysis_codes, files_per_suggestion, read_hints)
+        update_code_cache(suggestions, schema_signatures, analysis_codes, all_analysis_results)
+        
+        # Generate business-friendly summaries concurrently
+        logger.info("📋 Creating business summaries for %d insights", len(suggestions))
+        all_business_insights = await generate_insight_summary_batch(suggestions, all_analysis_results, llm)
+        
+        for suggestion, relevant_files, analysis_results, business_insights in zip(
+            suggestions, files_per_suggestion, all_analysis_results, all_business_insights
+        ):
+            title = suggestion.title
             
             # Calculate confidence score based on analysis quality
             confidence_score = calculate_insight_confidence(analysis_results, business_insights)
@@ -265,9 +393,9 @@ def generate_insights_node(state: InsightState) -> InsightState:
             # Create final insight structure optimized for database storage
             insight = {
                 "title": title,
-                "description": suggestion.get("description", ""),
-                "priority": suggestion["priority"],
-                "analysis_type": suggestion.get("type", "business_analysis"),
+                "description": suggestion.description,
+                "priority": suggestion.priority,
+                "analysis_type": suggestion.type,
                 "files_used": [os.path.basename(f) for f in relevant_files],
                 "data_sources": relevant_files,
                 "confidence": confidence_score,
@@ -297,19 +425,17 @@ def generate_insights_node(state: InsightState) -> InsightState:
             }
             
             final_insights.append(insight)
-            logger.info(f"✅ Completed analysis for {title}")
+            logger.info("✅ Completed analysis for %s", title)
         
-        logger.info(f"🎉 Generated {len(final_insights)} complete insights")
+        logger.info("🎉 Generated %d complete insights", len(final_insights))
         return {
-            **state, 
             "final_insights": final_insights, 
             "current_step": "insights_complete"
         }
         
     except Exception as e:
-        logger.error(f"❌ Insights generation failed: {e}")
+        logger.error("❌ Insights generation failed: %s", e)
         return {
-            **state, 
             "final_insights": final_insights,  # Return partial results
             "current_step": "insights_error"
         }
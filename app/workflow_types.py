@@ -1,12 +1,34 @@
+from dataclasses import dataclass
 from typing_extensions import TypedDict
 from typing import List, Dict, Any
 
+@dataclass(slots=True)
+class HelpSuggestion:
+    """One analysis proposed for the business, carried through the graph's nodes."""
+    title: str
+    description: str = ""
+    priority: str = "medium"
+    type: str = "business_analysis"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HelpSuggestion":
+        """Build a suggestion from an LLM JSON object, defaulting any missing fields."""
+        return cls(
+            title=str(data.get("title") or "General Analysis"),
+            description=str(data.get("description", "")),
+            priority=str(data.get("priority", "medium")),
+            type=str(data.get("type", "business_analysis"))
+        )
+
+# Used when the business context cannot be analysed
+DEFAULT_SUGGESTION = HelpSuggestion(title="General Analysis", description="Basic data insights", priority="medium")
+
 class InsightState(TypedDict):
     files: List[str]
     business_description: str
     file_metadata: Dict[str, Any]
     business_understanding: str
-    help_suggestions: List[Dict[str, Any]]
+    help_suggestions: List[HelpSuggestion]
     file_mappings: Dict[str, List[str]]
     final_insights: List[Dict[str, Any]]
     current_step: str
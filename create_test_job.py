@@ -18,49 +18,42 @@ def create_test_job():
         from psycopg.rows import dict_row
         
         database_url = os.getenv('DATABASE_URL')
-        conn = psycopg.connect(database_url, row_factory=dict_row)
         
-        with conn.cursor() as cursor:
-            # Get an existing file ID
-            cursor.execute("""
-                SELECT id, original_name 
-                FROM files 
-                WHERE status = 'uploaded' 
-                LIMIT 1
-            """)
-            
-            file_result = cursor.fetchone()
-            if not file_result:
-                print("❌ No uploaded files found. Upload some files first.")
-                return
-            
-            file_id = file_result['id']
-            file_name = file_result['original_name']
-            
-            print(f"📁 Using file: {file_name} (ID: {file_id})")
-            
-            # Create a test job
+        # The connection block commits on exit; closing without a commit would roll the job back
+        with psycopg.connect(database_url, row_factory=dict_row) as conn, conn.cursor() as cursor:
+            # Pick an uploaded file and create a test job for it in one round-trip
             cursor.execute("""
                 INSERT INTO processing_jobs (file_id, job_type, status)
-                VALUES (%s, %s, %s)
-                RETURNING id, created_at
+                SELECT f.id, %s, %s
+                FROM (
+                    SELECT id
+                    FROM files
+                    WHERE status = 'uploaded'
+                    LIMIT 1
+                ) f
+                RETURNING id, file_id, created_at,
+                    (SELECT original_name FROM files WHERE files.id = processing_jobs.file_id) AS original_name
             """, (
-                file_id,
                 'business_analysis',
                 'pending'
             ))
             
             job_result = cursor.fetchone()
+            if not job_result:
+                print("❌ No uploaded files found. Upload some files first.")
+                return
+            
             job_id = job_result['id']
+            file_id = job_result['file_id']
+            file_name = job_result['original_name']
             created_at = job_result['created_at']
             
+            print(f"📁 Using file: {file_name} (ID: {file_id})")
             print(f"✅ Created test job:")
             print(f"   Job ID: {job_id}")
             print(f"   File: {file_name}")
             print(f"   Status: pending")
             print(f"   Created: {created_at}")
-            
-        conn.close()
         
         print(f"\n🎯 Test job created successfully!")
         print(f"💡 Now run: python test_job_system.py")
@@ -33,25 +33,28 @@ def inspect_database_schema():
             """)
             tables = cursor.fetchall()
             
+            # Get column information for every table in one query
+            cursor.execute("""
+                SELECT 
+                    table_name,
+                    column_name, 
+                    data_type, 
+                    is_nullable,
+                    column_default
+                FROM information_schema.columns 
+                WHERE table_schema = 'public'
+                ORDER BY table_name, ordinal_position;
+            """)
+            columns_by_table = {}
+            for col in cursor.fetchall():
+                columns_by_table.setdefault(col['table_name'], []).append(col)
+            
             for table in tables:
                 table_name = table['table_name']
                 print(f"\n📊 Table: {table_name}")
                 print("-" * 30)
                 
-                # Get column information
-                cursor.execute("""
-                    SELECT 
-                        column_name, 
-                        data_type, 
-                        is_nullable,
-                        column_default
-                    FROM information_schema.columns 
-                    WHERE table_name = %s 
-                    ORDER BY ordinal_position;
-                """, (table_name,))
-                
-                columns = cursor.fetchall()
-                for col in columns:
+                for col in columns_by_table.get(table_name, []):
                     nullable = "NULL" if col['is_nullable'] == 'YES' else "NOT NULL"
                     default = f" DEFAULT {col['column_default']}" if col['column_default'] else ""
                     print(f"  {col['column_name']:<20} {col['data_type']:<15} {nullable}{default}")
@@ -39,7 +39,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
 
 from app.database import DatabaseManager
 from app.ai_workflow import run_complete_workflow
-from app.utils import setup_logger
+from app.utils import setup_logger, file_objects_to_temp_paths, create_temp_dir, cleanup_temp_dir
 
 # Setup logging
 logger = setup_logger(__name__)
@@ -84,9 +84,9 @@ class JobCronProcessor:
         self.shutdown_requested = False
         
         logger.info("🔧 Job cron processor initialized")
-        logger.info(f"   Poll interval: {poll_interval} seconds")
-        logger.info(f"   Max jobs: {max_jobs or 'unlimited'}")
-        logger.info(f"   Daemon mode: {daemon_mode}")
+        logger.info("   Poll interval: %s seconds", poll_interval)
+        logger.info("   Max jobs: %s", max_jobs or 'unlimited')
+        logger.info("   Daemon mode: %s", daemon_mode)
     
     def setup_signal_handlers(self) -> None:
         logger.info("setting up signal handlers")
@@ -94,7 +94,7 @@ class JobCronProcessor:
         """Setup signal handlers for graceful shutdown."""
         def signal_handler(signum: int, frame) -> None:
             signal_name = signal.Signals(signum).name
-            logger.info(f"🛑 Received {signal_name} signal - initiating graceful shutdown...")
+            logger.info("🛑 Received %s signal - initiating graceful shutdown...", signal_name)
             self.shutdown_requested = True
         
         signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
@@ -142,13 +142,13 @@ class JobCronProcessor:
                             'created_at': result['created_at']
                         }
                         
-                        logger.info(f"📋 Retrieved job {job['job_id']} (created: {job['created_at']})")
+                        logger.info("📋 Retrieved job %s (created: %s)", job['job_id'], job['created_at'])
                         return job
                     
                     return None
                     
         except Exception as e:
-            logger.error(f"❌ Error getting pending job: {e}")
+            logger.error("❌ Error getting pending job: %s", e)
             return None
     
     def get_file_data_objects(self, file_ids: list[str]) -> list[Dict[str, Any]]:
@@ -164,7 +164,7 @@ class JobCronProcessor:
         try:
             return self.db.get_file_data(file_ids)
         except Exception as e:
-            logger.error(f"❌ Error getting file data objects: {e}")
+            logger.error("❌ Error getting file data objects: %s", e)
             return []
 
     def get_file_paths(self, file_ids: list[str]) -> list[str]:
@@ -180,7 +180,7 @@ class JobCronProcessor:
         try:
             return self.db.get_file_paths(file_ids)
         except Exception as e:
-            logger.error(f"❌ Error getting file paths: {e}")
+            logger.error("❌ Error getting file paths: %s", e)
             return []
     
     def update_job_status(
@@ -223,11 +223,15 @@ class JobCronProcessor:
                                 error_message = %s
                             WHERE id = %s
                         """, (status, error_message, job_id))
-                    
-                    logger.info(f"✅ Updated job {job_id} status to: {status}")
+            
+            # Pipelined statements have only been queued; the caller reports the outcome
+            if not self.db.in_pipeline():
+                logger.info("✅ Updated job %s status to: %s", job_id, status)
                     
         except Exception as e:
-            logger.error(f"❌ Error updating job status: {e}")
+            if self.db.in_pipeline():
+                raise
+            logger.error("❌ Error updating job status: %s", e)
     
     def save_analysis_results(self, job_id: str, results: Dict[str, Any]) -> None:
         """
@@ -242,7 +246,9 @@ class JobCronProcessor:
             self.db.save_analysis_results(job_id, results)
                     
         except Exception as e:
-            logger.error(f"❌ Error saving results: {e}")
+            if self.db.in_pipeline():
+                raise
+            logger.error("❌ Error saving results: %s", e)
     
     def should_retry_job(self, job_id: str) -> bool:
         """
@@ -270,7 +276,7 @@ class JobCronProcessor:
                     return False
                     
         except Exception as e:
-            logger.error(f"❌ Error checking retry status: {e}")
+            logger.error("❌ Error checking retry status: %s", e)
             return False
     
     def reset_job_to_pending(self, job_id: str) -> None:
@@ -291,10 +297,10 @@ class JobCronProcessor:
                         WHERE id = %s
                     """, (job_id,))
                     
-                    logger.info(f"🔄 Reset job {job_id} to not-started for retry")
+                    logger.info("🔄 Reset job %s to not-started for retry", job_id)
                     
         except Exception as e:
-            logger.error(f"❌ Error resetting job: {e}")
+            logger.error("❌ Error resetting job: %s", e)
     
     def process_single_job(self, job: Dict[str, Any]) -> bool:
         """
@@ -310,57 +316,58 @@ class JobCronProcessor:
         business_description = job['business_description']
         file_ids = job['file_ids']
         
-        logger.info(f"⚡ Processing job {job_id}")
-        logger.info(f"   Business: {business_description[:100]}...")
-        logger.info(f"   Files: {len(file_ids)} file(s)")
+        logger.info("⚡ Processing job %s", job_id)
+        self.db.clear_file_cache()
+        logger.info("   Business: %s...", business_description[:100])
+        logger.info("   Files: %s file(s)", len(file_ids))
         
         try:
-            # Get file data objects from file IDs (supports bytea data)
-            file_objects = self.get_file_data_objects(file_ids)
-            
-            if not file_objects:
-                error_msg = f"No valid files found for IDs: {file_ids}"
-                logger.error(f"❌ {error_msg}")
-                self.update_job_status(job_id, 'failed', error_msg)
-                return False
-            
-            logger.info(f"📁 Processing {len(file_objects)} file objects")
-            
-            # Log file types for debugging
-            for file_obj in file_objects:
-                has_bytea = bool(file_obj.get('file_data'))
-                has_path = bool(file_obj.get('file_path'))
-                filename = file_obj.get('original_name', 'unknown')
-                logger.info(f"   📄 {filename}: bytea={has_bytea}, path={has_path}")
-            
-            # Run the AI workflow with file objects
-            result = run_complete_workflow(file_objects, business_description)
+            # Stream file rows straight into temp files so only one bytea payload is in memory
+            temp_dir = create_temp_dir()
+            try:
+                file_paths = file_objects_to_temp_paths(self.db.iter_file_data(file_ids), temp_dir)
+                
+                if not file_paths:
+                    error_msg = f"No valid files found for IDs: {file_ids}"
+                    logger.error("❌ %s", error_msg)
+                    self.update_job_status(job_id, 'failed', error_msg)
+                    return False
+                
+                logger.info("📁 Processing %s files", len(file_paths))
+                
+                # Run the AI workflow on the materialized files
+                result = run_complete_workflow(file_paths, business_description)
+            finally:
+                cleanup_temp_dir(temp_dir)
             
             if result['status'] == 'success':
-                # Save results to database
-                self.save_analysis_results(job_id, result['data'])
-                self.update_job_status(job_id, 'completed')
+                # Save results and mark the job done in one pipelined round-trip; any
+                # statement error is raised when the block exits and is retried below
+                with self.db.pipeline():
+                    self.save_analysis_results(job_id, result['data'])
+                    self.update_job_status(job_id, 'completed')
                 
+                logger.info("💾 Saved results and marked job %s completed", job_id)
                 insights_count = len(result['data'].get('final_insights', []))
-                logger.info(f"✅ Job {job_id} completed successfully - {insights_count} insights generated")
+                logger.info("✅ Job %s completed successfully - %s insights generated", job_id, insights_count)
                 return True
             else:
                 error_msg = result.get('error', 'Unknown workflow error')
-                logger.error(f"❌ Workflow failed for job {job_id}: {error_msg}")
+                logger.error("❌ Workflow failed for job %s: %s", job_id, error_msg)
                 self.update_job_status(job_id, 'failed', error_msg)
                 return False
                 
         except Exception as e:
             error_msg = f"Job processing error: {str(e)}"
-            logger.error(f"❌ {error_msg}")
-            logger.error(f"Stack trace: {traceback.format_exc()}")
+            logger.error("❌ %s", error_msg)
+            logger.error("Stack trace: %s", traceback.format_exc())
             
             # Check if we should retry
             if self.should_retry_job(job_id):
-                logger.info(f"🔄 Job {job_id} will be retried")
+                logger.info("🔄 Job %s will be retried", job_id)
                 self.reset_job_to_pending(job_id)
             else:
-                logger.info(f"❌ Job {job_id} failed permanently (max retries reached)")
+                logger.info("❌ Job %s failed permanently (max retries reached)", job_id)
                 self.update_job_status(job_id, 'failed', error_msg)
             
             return False
@@ -379,9 +386,12 @@ class JobCronProcessor:
                 return False
             
             if self.max_jobs and self.jobs_processed >= self.max_jobs:
-                logger.info(f"🏁 Reached maximum job limit ({self.max_jobs}), stopping")
+                logger.info("🏁 Reached maximum job limit (%s), stopping", self.max_jobs)
                 return False
             
+            # Fold insight writes since the last pass into one view refresh, outside any job's transaction
+            self.db.refresh_recent_insights_view_if_due()
+            
             logger.debug("going to find pending jobs")
             
             # Get next pending job
@@ -399,7 +409,7 @@ class JobCronProcessor:
                 return False
                 
         except Exception as e:
-            logger.error(f"❌ Error in job processing iteration: {e}")
+            logger.error("❌ Error in job processing iteration: %s", e)
             return False
     
     def print_status(self) -> None:
@@ -408,8 +418,8 @@ class JobCronProcessor:
             elapsed = datetime.now() - self.start_time
             rate = self.jobs_processed / elapsed.total_seconds() if elapsed.total_seconds() > 0 else 0
             
-            logger.info(f"📊 Status - Processed: {self.jobs_processed} jobs, "
-                       f"Elapsed: {elapsed}, Rate: {rate:.2f} jobs/sec")
+            logger.info("📊 Status - Processed: %s jobs, Elapsed: %s, Rate: %.2f jobs/sec",
+                        self.jobs_processed, elapsed, rate)
     
     def start_processing(self) -> None:
         """
@@ -455,9 +465,10 @@ class JobCronProcessor:
                     if self.max_jobs and self.jobs_processed >= self.max_jobs:
                         break
                     
-                    # Sleep between iterations (only if no job was processed)
+                    # Wait for a new-job notification (only if no job was processed);
+                    # poll_interval is the safety-net timeout
                     if not job_processed:
-                        time.sleep(self.poll_interval)
+                        self.db.wait_for_job(self.poll_interval)
                     else:
                         # Small delay between jobs to prevent overwhelming the system
                         time.sleep(1)
@@ -466,18 +477,18 @@ class JobCronProcessor:
                     logger.info("⏹️  Received keyboard interrupt")
                     break
                 except Exception as e:
-                    logger.error(f"❌ Unexpected error in processing loop: {e}")
-                    logger.error(f"Stack trace: {traceback.format_exc()}")
+                    logger.error("❌ Unexpected error in processing loop: %s", e)
+                    logger.error("Stack trace: %s", traceback.format_exc())
                     # Wait longer after errors
                     time.sleep(self.poll_interval * 2)
                     
         except Exception as e:
-            logger.error(f"❌ Fatal error in job processor: {e}")
-            logger.error(f"Stack trace: {traceback.format_exc()}")
+            logger.error("❌ Fatal error in job processor: %s", e)
+            logger.error("Stack trace: %s", traceback.format_exc())
         finally:
             self.running = False
             self.print_status()
-            logger.info(f"🏁 Job cron processor stopped. Total processed: {self.jobs_processed} jobs")
+            logger.info("🏁 Job cron processor stopped. Total processed: %s jobs", self.jobs_processed)
     
     def stop_processing(self) -> None:
         """Stop job processing."""
@@ -552,7 +563,7 @@ Examples:
     except KeyboardInterrupt:
         logger.info("👋 Shutting down job processor...")
     except Exception as e:
-        logger.error(f"❌ Fatal error: {e}")
+        logger.error("❌ Fatal error: %s", e)
         sys.exit(1)
 
 
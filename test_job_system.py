@@ -22,14 +22,14 @@ def test_database_connection():
         from app.database import DatabaseManager
         
         db = DatabaseManager()
-        conn = db.get_connection()
         
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT version();")
-            version = cursor.fetchone()
-            print(f"✅ Database connected: {version['version'][:100]}...")
+        with db.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT version();")
+                version = cursor.fetchone()
+                print(f"✅ Database connected: {version['version'][:100]}...")
         
-        conn.close()
+        db.close()
         return True
         
     except Exception as e:
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from app import analysis_engine
+from app.analysis_engine import execute_analysis_code_batch, get_analysis_pool, shutdown_analysis_pool
+
+GOOD_CODE = "def analyze_data(file_paths):\n    return {'metrics': {'ok': 1}}"
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    shutdown_analysis_pool()
+    yield
+    shutdown_analysis_pool(terminate=True)
+
+def test_unpicklable_result_fails_only_its_analysis():
+    unpicklable = "def analyze_data(file_paths):\n    return {'metrics': {}, 'formatter': lambda x: x}"
+    results = asyncio.run(execute_analysis_code_batch([unpicklable, GOOD_CODE], [[], []]))
+    assert "error" in results[0]
+    assert results[1] == {'metrics': {'ok': 1}}
+
+def test_hung_analysis_times_out_and_recycles_pool(monkeypatch):
+    monkeypatch.setattr(analysis_engine, "ANALYSIS_TIMEOUT_SECONDS", 2)
+    hung = "def analyze_data(file_paths):\n    while True:\n        if file_paths == 'never':\n            break"
+    pool = get_analysis_pool()
+    results = asyncio.run(execute_analysis_code_batch([hung], [[]]))
+    assert "exceeded" in results[0]["error"]
+    assert get_analysis_pool() is not pool
+    # The replacement pool still runs analyses
+    assert asyncio.run(execute_analysis_code_batch([GOOD_CODE], [[]])) == [{'metrics': {'ok': 1}}]
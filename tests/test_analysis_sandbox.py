@@ -0,0 +1,22 @@
+import pytest
+
+from app.analysis_engine import execute_analysis_code, get_safe_builtins
+
+def test_sandbox_import_allows_allowlisted_modules():
+    restricted_import = get_safe_builtins()['__import__']
+    assert restricted_import('math').sqrt(16) == 4
+    assert restricted_import('collections', fromlist=('Counter',)).Counter
+
+@pytest.mark.parametrize("name", ["os", "subprocess", "importlib", "os.path"])
+def test_sandbox_import_rejects_other_modules(name):
+    with pytest.raises(ImportError):
+        get_safe_builtins()['__import__'](name)
+
+def test_generated_code_can_import_allowlisted_modules():
+    code = "import math\n\ndef analyze_data(file_paths):\n    return {'metrics': {'root': math.sqrt(9)}}"
+    assert execute_analysis_code(code, []) == {'metrics': {'root': 3.0}}
+
+def test_generated_code_cannot_import_other_modules():
+    code = "import os\n\ndef analyze_data(file_paths):\n    return {'metrics': {}}"
+    result = execute_analysis_code(code, [])
+    assert "not allowed" in result['error']
@@ -0,0 +1,54 @@
+import os
+import time
+
+import pytest
+
+from app import code_cache
+from app.code_cache import make_code_cache_key, lookup_code, store_code, discard_code
+from app.workflow_types import HelpSuggestion
+
+SUGGESTION = HelpSuggestion(title="Revenue Analysis", description="Revenue by product")
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "code_cache"
+    monkeypatch.setattr(code_cache, "ANALYSIS_CODE_CACHE_DIR", str(directory))
+    return directory
+
+def test_key_depends_on_suggestion_and_schema():
+    key = make_code_cache_key(SUGGESTION, "a:int64")
+    assert key == make_code_cache_key(HelpSuggestion(title="Revenue Analysis", description="Revenue by product"), "a:int64")
+    assert key != make_code_cache_key(SUGGESTION, "a:float64")
+    assert key != make_code_cache_key(HelpSuggestion(title="Churn", description="Revenue by product"), "a:int64")
+
+def test_store_then_lookup_round_trips():
+    key = make_code_cache_key(SUGGESTION, "a:int64")
+    assert lookup_code(key) is None
+    store_code(key, "def analyze_data(file_paths):\n    return {}")
+    assert lookup_code(key) == "def analyze_data(file_paths):\n    return {}"
+
+def test_expired_entries_are_dropped(cache_dir):
+    key = make_code_cache_key(SUGGESTION, "a:int64")
+    store_code(key, "code")
+    stale = time.time() - code_cache.ANALYSIS_CODE_CACHE_TTL_SECONDS - 60
+    os.utime(cache_dir / f"{key}.py", (stale, stale))
+
+    assert lookup_code(key) is None
+    assert not (cache_dir / f"{key}.py").exists()
+
+def test_discard_removes_entry_and_tolerates_missing():
+    key = make_code_cache_key(SUGGESTION, "a:int64")
+    store_code(key, "code")
+    discard_code(key)
+    assert lookup_code(key) is None
+    discard_code(key)
+
+def test_failed_store_leaves_no_temp_file(cache_dir, monkeypatch):
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(code_cache.os, "replace", failing_replace)
+    key = make_code_cache_key(SUGGESTION, "a:int64")
+    store_code(key, "code")
+
+    assert os.listdir(cache_dir) == []
@@ -0,0 +1,62 @@
+import pytest
+
+from app.code_validator import validate_analysis_code
+
+VALID_CODE = """
+import math
+from collections import Counter
+
+def analyze_data(file_paths):
+    df = load_data(file_paths[0])
+    total = 0
+    while True:
+        for value in df['revenue']:
+            total += value
+        break
+    return {"metrics": {"total": total, "root": math.sqrt(total)}, "counts": dict(Counter([1, 1]))}
+"""
+
+def test_accepts_allowlisted_analysis_code():
+    tree = validate_analysis_code(VALID_CODE)
+    assert compile(tree, "<analysis>", "exec")
+
+@pytest.mark.parametrize("code", [
+    "import os",
+    "from subprocess import run",
+    "from . import utils",
+    "def analyze_data(p):\n    return __import__('os').system('id')",
+    "def analyze_data(p):\n    return getattr(p, 'x')",
+    "def analyze_data(p):\n    setattr(p, 'x', 1)",
+    "def analyze_data(p):\n    return eval('1')",
+    "def analyze_data(p):\n    return open(p[0]).read()",
+    "def analyze_data(p):\n    return ().__class__.__bases__[0].__subclasses__()",
+    "def analyze_data(p):\n    return analyze_data.__globals__",
+    "def analyze_data(p):\n    return pd.__builtins__",
+])
+def test_rejects_sandbox_escapes(code):
+    with pytest.raises(ValueError):
+        validate_analysis_code(code)
+
+@pytest.mark.parametrize("code", [
+    "while True:\n    x = 1",
+    "while True:\n    for i in range(3):\n        break",
+    "while 1:\n    while False:\n        break",
+    "while True:\n    def stop():\n        return 1",
+])
+def test_rejects_loops_that_never_exit(code):
+    with pytest.raises(ValueError):
+        validate_analysis_code(code)
+
+@pytest.mark.parametrize("code", [
+    "while True:\n    break",
+    "while True:\n    if x:\n        break",
+    "def f():\n    while True:\n        for i in range(3):\n            return i",
+    "while True:\n    for i in range(3):\n        pass\n    else:\n        break",
+    "while x:\n    pass",
+])
+def test_accepts_loops_that_can_exit(code):
+    validate_analysis_code(code)
+
+def test_rejects_syntax_errors():
+    with pytest.raises(ValueError, match="syntax error"):
+        validate_analysis_code("def analyze_data(:")
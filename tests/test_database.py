@@ -0,0 +1,276 @@
+"""
+Database tests; they need a disposable Postgres named by TEST_DATABASE_URL
+(tables are dropped and recreated) and are skipped without one
+"""
+import os
+import uuid
+
+import psycopg
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+SCHEMA_SQL = """
+    DROP MATERIALIZED VIEW IF EXISTS mv_recent_insights;
+    DROP TABLE IF EXISTS insights, processing_jobs, files;
+    CREATE TABLE files (
+        id UUID PRIMARY KEY,
+        filename VARCHAR(255),
+        original_name VARCHAR(255),
+        file_path VARCHAR(500),
+        file_data BYTEA,
+        mime_type VARCHAR(100),
+        file_size INTEGER,
+        status VARCHAR(20) DEFAULT 'uploaded',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE processing_jobs (
+        id UUID PRIMARY KEY,
+        file_id UUID REFERENCES files(id),
+        job_type VARCHAR(100),
+        business_description TEXT,
+        status VARCHAR(20) DEFAULT 'pending',
+        metadata JSONB,
+        retry_count INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        completed_at TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        error_message TEXT
+    );
+    CREATE TABLE insights (
+        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+        job_id UUID REFERENCES processing_jobs(id),
+        file_id UUID REFERENCES files(id),
+        insight_type VARCHAR(100),
+        content JSONB NOT NULL,
+        confidence_score DECIMAL(3,2),
+        metadata JSONB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+INSIGHTS = [
+    {
+        "title": "Revenue Analysis",
+        "confidence": 0.9,
+        "metrics": {"total": 100, "growth": 0.2},
+        "key_findings": ["a", "b"],
+        "recommendations": ["r"],
+        "visualizations": ["v1", "v2", "v3"],
+        "generated_at": "2024-01-01T00:00:00",
+        "status": "success"
+    },
+    {
+        "metrics": {},
+        "key_findings": [],
+        "status": "error",
+        "error": "boom"
+    },
+    {
+        "title": "Churn",
+        "confidence_score": 75,
+        "metrics": {"rate": 0.1},
+        "key_findings": ["c"],
+        "recommendations": ["s", "t"],
+        "generated_at": "2024-01-02T00:00:00"
+    },
+    {"title": "Inventory", "key_findings": ["d"], "recommendations": ["u"]}
+]
+
+def legacy_metadata(insights):
+    """Metadata the Python implementation wrote before the aggregates moved into SQL."""
+    return {
+        'total_insights': len(insights),
+        'insight_types': [insight.get('title', 'General Analysis') for insight in insights],
+        'analysis_summary': {
+            'total_metrics': sum(len(insight.get('metrics', {})) for insight in insights),
+            'total_findings': sum(len(insight.get('key_findings', [])) for insight in insights),
+            'total_recommendations': sum(len(insight.get('recommendations', [])) for insight in insights),
+            'total_visualizations': sum(len(insight.get('visualizations', [])) for insight in insights)
+        },
+        'execution_info': {
+            'generated_at': insights[0].get('generated_at') if insights else None,
+            'status': 'success' if all(insight.get('status') != 'error' for insight in insights) else 'partial_success'
+        }
+    }
+
+@pytest.fixture
+def db(monkeypatch):
+    with psycopg.connect(TEST_DATABASE_URL, autocommit=True) as conn:
+        conn.execute(SCHEMA_SQL)
+    monkeypatch.setenv("DATABASE_URL", TEST_DATABASE_URL)
+    monkeypatch.setenv("DB_POOL_MIN_SIZE", "1")
+
+    from app.database import DatabaseManager
+    manager = DatabaseManager()
+    yield manager
+    manager.close()
+
+def fetch_all(sql, params=()):
+    with psycopg.connect(TEST_DATABASE_URL, row_factory=psycopg.rows.dict_row) as conn:
+        return conn.execute(sql, params).fetchall()
+
+def create_file(status="uploaded", data=b"a,b\n1,2\n"):
+    file_id = str(uuid.uuid4())
+    with psycopg.connect(TEST_DATABASE_URL) as conn:
+        conn.execute(
+            "INSERT INTO files (id, filename, original_name, file_path, file_data, mime_type, file_size, status) "
+            "VALUES (%s, 'data.csv', 'Data.csv', '/tmp/data.csv', %s, 'text/csv', %s, %s)",
+            (file_id, data, len(data), status)
+        )
+    return file_id
+
+def create_job(file_id, created_at="2024-01-01 00:00:00", status="pending"):
+    job_id = str(uuid.uuid4())
+    with psycopg.connect(TEST_DATABASE_URL) as conn:
+        conn.execute(
+            "INSERT INTO processing_jobs (id, file_id, job_type, business_description, status, created_at) "
+            "VALUES (%s, %s, 'analysis', 'A shop', %s, %s)",
+            (job_id, file_id, status, created_at)
+        )
+    return job_id
+
+def test_save_analysis_results_matches_legacy_metadata(db):
+    file_id = create_file()
+    job_id = create_job(file_id)
+
+    db.save_analysis_results(job_id, {"final_insights": INSIGHTS})
+
+    [row] = fetch_all("SELECT * FROM insights WHERE job_id = %s", (job_id,))
+    assert row["metadata"] == legacy_metadata(INSIGHTS)
+    assert str(row["file_id"]) == file_id
+    assert row["insight_type"] == "Revenue Analysis, General Analysis, Churn (+1 more)"
+    # mean of 0.9, 0.3 (error), 0.75 (percentage) and 0.85 (complete insight)
+    assert float(row["confidence_score"]) == 0.70
+    assert row["content"]["final_insights"] == INSIGHTS
+    assert row["content"]["summary"]["total_insights"] == len(INSIGHTS)
+
+def test_save_analysis_results_all_successful(db):
+    job_id = create_job(create_file())
+    insights = [INSIGHTS[0], INSIGHTS[2]]
+
+    db.save_analysis_results(job_id, {"final_insights": insights})
+
+    [row] = fetch_all("SELECT metadata FROM insights WHERE job_id = %s", (job_id,))
+    assert row["metadata"] == legacy_metadata(insights)
+    assert row["metadata"]["execution_info"]["status"] == "success"
+
+def test_save_analysis_results_without_insights_writes_nothing(db):
+    job_id = create_job(create_file())
+
+    db.save_analysis_results(job_id, {"final_insights": []})
+
+    assert fetch_all("SELECT id FROM insights WHERE job_id = %s", (job_id,)) == []
+
+def test_save_analysis_results_rows_writes_one_row_per_insight(db):
+    file_id = create_file()
+    job_id = create_job(file_id)
+
+    db.save_analysis_results_rows(job_id, {"final_insights": INSIGHTS})
+
+    rows = fetch_all("SELECT * FROM insights WHERE job_id = %s", (job_id,))
+    by_type = {row["insight_type"]: row for row in rows}
+    assert len(rows) == len(INSIGHTS)
+    assert sorted(by_type) == ["Churn", "General Analysis", "Inventory", "Revenue Analysis"]
+    assert all(str(row["file_id"]) == file_id for row in rows)
+    assert float(by_type["Churn"]["confidence_score"]) == 0.75
+    assert by_type["Revenue Analysis"]["content"] == INSIGHTS[0]
+    assert by_type["General Analysis"]["metadata"] == {
+        "execution_info": {"generated_at": None, "status": "error"}
+    }
+
+def test_claim_job_with_files_claims_oldest_job_and_its_file(db):
+    payload = b"region,revenue\nnorth,10\n"
+    newer = create_job(create_file(), created_at="2024-01-02 00:00:00")
+    oldest_file = create_file(data=payload)
+    oldest = create_job(oldest_file, created_at="2024-01-01 00:00:00")
+    create_job(create_file(), created_at="2023-12-31 00:00:00", status="completed")
+
+    job = db.claim_job_with_files()
+
+    assert job["job_id"] == oldest
+    assert job["file_ids"] == [oldest_file]
+    assert job["business_description"] == "A shop"
+    [file] = job["files"]
+    assert file["id"] == oldest_file
+    assert bytes(file["file_data"]) == payload
+    assert file["file_size"] == len(payload)
+    [row] = fetch_all("SELECT status, started_at FROM processing_jobs WHERE id = %s", (oldest,))
+    assert row["status"] == "processing" and row["started_at"] is not None
+
+    assert db.claim_job_with_files()["job_id"] == newer
+    assert db.claim_job_with_files() is None
+
+def test_claim_job_with_files_skips_files_not_uploaded(db):
+    job_id = create_job(create_file(status="deleted"))
+
+    job = db.claim_job_with_files()
+
+    assert job["job_id"] == job_id
+    assert job["files"] == []
+
+def test_pipelined_save_and_complete_commit_together(db):
+    job_id = create_job(create_file())
+
+    with db.pipeline():
+        db.save_analysis_results(job_id, {"final_insights": INSIGHTS[:1]})
+        db.update_job_status(job_id, "completed")
+
+    [job] = fetch_all("SELECT status, completed_at FROM processing_jobs WHERE id = %s", (job_id,))
+    assert job["status"] == "completed" and job["completed_at"] is not None
+    assert len(fetch_all("SELECT id FROM insights WHERE job_id = %s", (job_id,))) == 1
+
+def test_pipelined_write_error_propagates_and_rolls_back(db):
+    job_id = create_job(create_file())
+
+    with pytest.raises(psycopg.Error):
+        with db.pipeline():
+            db.save_analysis_results(job_id, {"final_insights": INSIGHTS[:1]})
+            db.update_job_status("not-a-uuid", "completed")
+
+    assert fetch_all("SELECT id FROM insights WHERE job_id = %s", (job_id,)) == []
+
+def test_fail_or_retry_job_requeues_until_retries_run_out(db):
+    from app.database import MAX_JOB_RETRIES
+    job_id = create_job(create_file(), status="processing")
+
+    for attempt in range(MAX_JOB_RETRIES):
+        assert db.fail_or_retry_job(job_id, f"attempt {attempt}") is True
+        [row] = fetch_all("SELECT status, started_at, retry_count FROM processing_jobs WHERE id = %s", (job_id,))
+        assert (row["status"], row["started_at"], row["retry_count"]) == ("pending", None, attempt + 1)
+
+    assert db.fail_or_retry_job(job_id, "final") is False
+    [row] = fetch_all("SELECT status, error_message, retry_count FROM processing_jobs WHERE id = %s", (job_id,))
+    assert (row["status"], row["error_message"], row["retry_count"]) == ("failed", "final", MAX_JOB_RETRIES + 1)
+
+def test_fail_or_retry_job_unknown_job(db):
+    assert db.fail_or_retry_job(str(uuid.uuid4()), "gone") is False
+
+def test_release_jobs_only_requeues_jobs_still_processing(db):
+    claimed = create_job(create_file(), status="processing")
+    finished = create_job(create_file(), status="completed")
+
+    assert db.release_jobs([claimed, finished]) == 1
+
+    rows = {str(row["id"]): row for row in fetch_all("SELECT id, status, started_at, retry_count FROM processing_jobs")}
+    assert (rows[claimed]["status"], rows[claimed]["started_at"], rows[claimed]["retry_count"]) == ("pending", None, 0)
+    assert rows[finished]["status"] == "completed"
+
+def test_run_once_releases_prefetched_jobs_left_unprocessed(db, monkeypatch):
+    from app.job_processor import JobProcessor
+    first = create_job(create_file(), created_at="2024-01-01 00:00:00")
+    second = create_job(create_file(), created_at="2024-01-02 00:00:00")
+    processor = JobProcessor(prefetch_size=2, db=db)
+
+    def crash(job):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(processor, "process_single_job", crash)
+    with pytest.raises(KeyboardInterrupt):
+        processor.run_once()
+
+    rows = fetch_all("SELECT id, status FROM processing_jobs ORDER BY created_at")
+    assert [(str(row["id"]), row["status"]) for row in rows] == [(first, "pending"), (second, "pending")]
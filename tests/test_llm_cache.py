@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app import llm_cache
+from app.llm_cache import cached_ainvoke, clear_response_cache
+
+class FakeResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        return FakeResponse(f"answer {self.calls}")
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_response_cache()
+    yield
+    clear_response_cache()
+
+def test_cache_is_enabled_at_shipped_temperature():
+    assert llm_cache.CACHE_ENABLED
+
+def test_repeated_prompt_skips_llm_call():
+    llm = CountingLLM()
+    first = asyncio.run(cached_ainvoke(llm, "Summarize revenue"))
+    second = asyncio.run(cached_ainvoke(llm, "Summarize revenue"))
+    assert first == second == "answer 1"
+    assert llm.calls == 1
+
+def test_different_prompts_call_llm():
+    llm = CountingLLM()
+    asyncio.run(cached_ainvoke(llm, "Summarize revenue"))
+    asyncio.run(cached_ainvoke(llm, "Summarize costs"))
+    assert llm.calls == 2
+
+def test_cache_bypassed_when_disabled(monkeypatch):
+    monkeypatch.setattr(llm_cache, "CACHE_ENABLED", False)
+    llm = CountingLLM()
+    asyncio.run(cached_ainvoke(llm, "Summarize revenue"))
+    asyncio.run(cached_ainvoke(llm, "Summarize revenue"))
+    assert llm.calls == 2
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "monotonic", lambda: now[0])
+    llm = CountingLLM()
+    asyncio.run(cached_ainvoke(llm, "Summarize revenue"))
+
+    now[0] += llm_cache.CACHE_TTL_SECONDS - 1
+    asyncio.run(cached_ainvoke(llm, "Summarize revenue"))
+    assert llm.calls == 1
+
+    now[0] += 2
+    assert asyncio.run(cached_ainvoke(llm, "Summarize revenue")) == "answer 2"
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    monkeypatch.setattr(llm_cache, "MAX_CACHE_ENTRIES", 2)
+    llm = CountingLLM()
+    for prompt in ("first", "second", "first", "third"):
+        asyncio.run(cached_ainvoke(llm, prompt))
+    assert llm.calls == 3
+
+    # "second" was least recently used when "third" arrived
+    asyncio.run(cached_ainvoke(llm, "first"))
+    assert llm.calls == 3
+    asyncio.run(cached_ainvoke(llm, "second"))
+    assert llm.calls == 4
+
+def test_key_includes_rendered_chat_messages():
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    system_first = [SystemMessage(content="You analyse data"), HumanMessage(content="Revenue?")]
+    other_system = [SystemMessage(content="You write poems"), HumanMessage(content="Revenue?")]
+    assert llm_cache.hash_prompt(system_first) == llm_cache.hash_prompt(list(system_first))
+    assert llm_cache.hash_prompt(system_first) != llm_cache.hash_prompt(other_system)
@@ -0,0 +1,16 @@
+import pytest
+
+from app.database import pool_settings
+
+def test_prepare_threshold_left_to_psycopg_when_unset(monkeypatch):
+    monkeypatch.delenv("DB_PREPARE_THRESHOLD", raising=False)
+    assert "prepare_threshold" not in pool_settings()["kwargs"]
+
+@pytest.mark.parametrize("value", ["", " ", "none", "None"])
+def test_prepare_threshold_empty_or_none_disables_preparing(monkeypatch, value):
+    monkeypatch.setenv("DB_PREPARE_THRESHOLD", value)
+    assert pool_settings()["kwargs"]["prepare_threshold"] is None
+
+def test_prepare_threshold_from_env(monkeypatch):
+    monkeypatch.setenv("DB_PREPARE_THRESHOLD", "0")
+    assert pool_settings()["kwargs"]["prepare_threshold"] == 0
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+FAKE_RESPONSE = json.dumps({
+    "business_understanding": "A shop selling products to customers.",
+    "help_suggestions": [
+        {"title": "Revenue Analysis", "description": "Revenue by product", "priority": "high"}
+    ],
+    "mappings": {
+        "Revenue Analysis": {"relevant_files": ["sales.csv"], "confidence": "high", "reasoning": "sales data"}
+    },
+    "executive_summary": "Revenue is concentrated in one product.",
+    "key_findings": ["Widgets drive most revenue"],
+    "recommendations": ["Stock more widgets"],
+    "next_steps": ["Review pricing"]
+})
+
+class FakeResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+class FakeHttpClient:
+    def __init__(self):
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+class FakeLLM:
+    """Stands in for AzureChatOpenAI; like httpx, it only works on the loop that created it."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.http_async_client = FakeHttpClient()
+        self.calls = 0
+
+    async def ainvoke(self, prompt):
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop or self.loop.is_closed() or self.http_async_client.closed:
+            raise RuntimeError("Event loop is closed")
+        self.calls += 1
+        return FakeResponse(FAKE_RESPONSE)
+
+def test_run_complete_workflow_twice_in_one_process(tmp_path, monkeypatch):
+    """Each synchronous run gets its own event loop, so it must get its own LLM client."""
+    monkeypatch.setenv("LANGCHAIN_TRACING_V2", "false")
+
+    from app import analysis_engine, code_cache, llm_cache, workflow_nodes
+    from app.ai_workflow import run_complete_workflow
+
+    created = []
+
+    def create_fake_llm():
+        llm = FakeLLM()
+        created.append(llm)
+        return llm
+
+    async def fake_execute_batch(codes, files_per_code, dtype_hints=None):
+        return [{"metrics": {"total_revenue": 60}, "key_findings": ["ok"]} for _ in codes]
+
+    monkeypatch.setattr(workflow_nodes, "_create_llm", create_fake_llm)
+    # Both runs must reach their own LLM rather than the response cache
+    monkeypatch.setattr(llm_cache, "CACHE_ENABLED", False)
+    monkeypatch.setattr(analysis_engine, "execute_analysis_code_batch", fake_execute_batch)
+    monkeypatch.setattr(code_cache, "ANALYSIS_CODE_CACHE_DIR", str(tmp_path / "code_cache"))
+
+    data_file = tmp_path / "sales.csv"
+    data_file.write_text("product,revenue\nwidget,40\ngadget,20\n")
+
+    results = [
+        run_complete_workflow([str(data_file)], "We sell widgets and gadgets online")
+        for _ in range(2)
+    ]
+
+    for result in results:
+        assert result["status"] == "success"
+        insights = result["data"]["final_insights"]
+        assert [insight["title"] for insight in insights] == ["Revenue Analysis"]
+        assert insights[0]["executive_summary"] == "Revenue is concentrated in one product."
+
+    assert len(created) == 2
+    assert created[0].loop is not created[1].loop
+    assert all(llm.calls > 0 for llm in created)
+    assert all(llm.http_async_client.closed for llm in created)
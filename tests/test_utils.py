@@ -0,0 +1,112 @@
+import pandas as pd
+import pytest
+
+from app import utils
+
+CSV_WITH_DATES = """id,order_date,created_at,amount,qty,code,name,paid,note
+1,2024-01-05,2024-01-05 10:00:00,10.5,3,1,a,true,
+2,2024-02-06,2024-01-06T11:30:00,,4,x,,false,
+3,,,7,,3,c,true,
+"""
+
+@pytest.mark.skipif(utils.CSV_ENGINE != 'pyarrow', reason="pyarrow not installed")
+def test_read_csv_matches_pandas_inference(tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text(CSV_WITH_DATES)
+
+    fast = utils.read_csv(str(path))
+    default = pd.read_csv(str(path))
+
+    assert fast.dtypes.to_dict() == default.dtypes.to_dict()
+    pd.testing.assert_frame_equal(fast, default)
+
+@pytest.mark.skipif(utils.CSV_ENGINE != 'pyarrow', reason="pyarrow not installed")
+def test_read_csv_keeps_dates_as_text_with_usecols(tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text(CSV_WITH_DATES)
+
+    fast = utils.read_csv(str(path), usecols=["order_date", "amount"])
+    default = pd.read_csv(str(path), usecols=["order_date", "amount"])
+
+    pd.testing.assert_frame_equal(fast, default)
+
+PROFILE_CSV = """id,order_date,created_at,amount,qty,region,paid,returned,empty
+1,2024-01-05,2024-01-05 10:00:00,10.5,3,north,true,false,
+2,2024-02-06,2024-01-06 11:30:00,,4,,false,,
+3,,,7,,south,true,true,
+4,2024-03-01,2024-03-01 09:15:00,2.25,8,east,false,false,
+"""
+
+@pytest.mark.skipif(utils.pa_csv is None, reason="pyarrow not installed")
+def test_arrow_summary_matches_pandas_summary(tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text(PROFILE_CSV)
+
+    arrow = utils.summarize_csv_arrow(str(path))
+    pandas = utils.format_dataframe_summary(pd.read_csv(str(path)))
+
+    for key in ("columns", "shape", "data_types", "null_counts", "numeric_columns", "categorical_columns"):
+        assert arrow[key] == pandas[key], key
+
+def test_safe_json_parse_recovers_wrapped_objects():
+    reply = 'Here you go:\n```json\n{"title": "Revenue", "values": [1, 2]}\n```'
+    assert utils.safe_json_parse(reply) == {"title": "Revenue", "values": [1, 2]}
+    assert utils.safe_json_parse(reply.encode()) == {"title": "Revenue", "values": [1, 2]}
+
+def test_safe_json_parse_accepts_nan_like_stdlib_json():
+    parsed = utils.safe_json_parse('{"growth": NaN, "max": Infinity}')
+    assert parsed["growth"] != parsed["growth"]
+    assert parsed["max"] == float("inf")
+
+def test_safe_json_parse_falls_back_on_garbage():
+    assert utils.safe_json_parse("not json", {"ok": False}) == {"ok": False}
+    assert utils.safe_json_parse(None) == {}
+    assert utils.safe_json_parse("[1, 2]") == [1, 2]
+
+def test_streaming_summary_matches_pandas_summary(tmp_path, monkeypatch):
+    # Later chunks widen types: ints gain nulls, and a numeric column gains text
+    rows = ["id,qty,code,region"]
+    rows += [f"{i},{i},{i},north" for i in range(5)]
+    rows += ["5,,x,", "6,7,8,south"]
+    path = tmp_path / "big.csv"
+    path.write_text("\n".join(rows) + "\n")
+    monkeypatch.setattr(utils, "METADATA_STREAM_CHUNK_ROWS", 2)
+
+    streamed = utils.summarize_csv_streaming(str(path))
+    whole = utils.format_dataframe_summary(pd.read_csv(str(path)))
+
+    for key in ("columns", "shape", "data_types", "null_counts", "numeric_columns", "categorical_columns"):
+        assert streamed[key] == whole[key], key
+
+def test_get_file_metadata_reuses_summary_for_identical_contents(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "_metadata_cache", type(utils._metadata_cache)())
+    first = tmp_path / "a.csv"
+    second = tmp_path / "b.csv"
+    first.write_text("x,y\n1,2\n")
+    second.write_text("x,y\n1,2\n")
+    calls = []
+
+    def summarize(file_path):
+        calls.append(file_path)
+        return utils.summarize_file(file_path)
+
+    meta_a = utils.get_file_metadata(str(first), summarize)
+    meta_b = utils.get_file_metadata(str(second), summarize)
+
+    assert calls == [str(first)]
+    assert (meta_a["filename"], meta_b["filename"]) == ("a.csv", "b.csv")
+    assert meta_a["columns"] == meta_b["columns"] == ["x", "y"]
+
+def test_get_file_metadata_does_not_cache_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "_metadata_cache", type(utils._metadata_cache)())
+    path = tmp_path / "a.csv"
+    path.write_text("x\n1\n")
+    calls = []
+
+    def failing_summarize(file_path):
+        calls.append(file_path)
+        return {"error": "unreadable"}
+
+    utils.get_file_metadata(str(path), failing_summarize)
+    utils.get_file_metadata(str(path), failing_summarize)
+    assert len(calls) == 2
@@ -50,8 +50,8 @@ def run_and_show_insights():
             
             print(f"\n💡 Help Suggestions Generated: {len(data.get('help_suggestions', []))}")
             for i, suggestion in enumerate(data.get('help_suggestions', []), 1):
-                print(f"   {i}. {suggestion.get('title', 'N/A')} (Priority: {suggestion.get('priority', 'N/A')})")
-                print(f"      Description: {suggestion.get('description', 'N/A')}")
+                print(f"   {i}. {suggestion.title} (Priority: {suggestion.priority})")
+                print(f"      Description: {suggestion.description or 'N/A'}")
             
             print(f"\n🗂️  File Mappings:")
             for title, mapping in data.get('file_mappings', {}).items():